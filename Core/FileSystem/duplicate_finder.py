@@ -0,0 +1,240 @@
+"""
+重复文件查找模块
+基于文件索引分阶段查找内容相同的文件并统计可回收空间
+"""
+import os
+import mmap
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .file_index import FileIndex
+
+SAMPLE_SIZE = 64 * 1024  # 部分哈希读取的首尾字节数
+HASH_CHUNK = 8 * 1024 * 1024  # 完整哈希时每次送入哈希函数的字节数
+
+class DuplicateFinder:
+    """
+    重复文件查找器
+
+    1. 从文件索引中按大小分组
+    2. 对同大小的文件计算首尾64KiB的部分哈希
+    3. 部分哈希仍相同的文件并行计算基于mmap的完整哈希
+    哈希结果按 (设备, inode, 修改时间, 大小) 缓存，重复运行时无需重新读取文件
+    """
+    def __init__(self, index: FileIndex, cache_path: Optional[str] = None, max_workers: int = 4):
+        """
+        Args:
+            index: 文件索引
+            cache_path: 哈希缓存数据库路径
+            max_workers: 并行计算哈希的线程数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.index = index
+        self.max_workers = max_workers
+        self._cache_path = Path(cache_path) if cache_path else Path("data") / "hash_cache.db"
+        self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self._cache_path), check_same_thread=False)
+        self._init_db()
+        self._cache = self._load_cache()
+
+    def _init_db(self):
+        """初始化哈希缓存表"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS hashes (
+                    dev INTEGER NOT NULL,
+                    ino INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    partial TEXT,
+                    full TEXT,
+                    PRIMARY KEY (dev, ino)
+                )
+            """)
+            self._conn.commit()
+
+    def _load_cache(self) -> Dict[Tuple[int, int], List]:
+        """加载哈希缓存"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dev, ino, mtime_ns, size, partial, full FROM hashes"
+            ).fetchall()
+        return {(row[0], row[1]): list(row[2:]) for row in rows}
+
+    def find_duplicates(self, roots: Optional[List[str]] = None, min_size: int = 1,
+                        update_index: bool = True) -> Dict:
+        """
+        查找重复文件
+
+        Args:
+            roots: 查找的目录，None表示整个索引
+            min_size: 最小文件大小
+            update_index: 是否先增量更新索引
+
+        Returns:
+            查找结果，包含重复分组、可回收字节数和各阶段统计
+        """
+        started = time.monotonic()
+        if roots and update_index:
+            self.index.update(roots)
+
+        size_groups: Dict[int, List[str]] = {}
+        for root in roots or [None]:
+            for size, paths in self.index.get_size_collisions(min_size, root).items():
+                size_groups.setdefault(size, []).extend(paths)
+
+        stats = {"size_candidates": 0, "partial_candidates": 0, "full_hashed": 0, "cache_hits": 0}
+        dirty = {}
+        groups = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 阶段1: 按大小分组，同一inode的硬链接只保留一个
+            candidates = []
+            for size, paths in size_groups.items():
+                files = self._stat_files(paths, size)
+                if len(files) > 1:
+                    candidates.append((size, files))
+                    stats["size_candidates"] += len(files)
+
+            # 阶段2: 部分哈希
+            partial_groups = []
+            for size, files in candidates:
+                hashes = self._hash_all(executor, files, size, "partial", stats, dirty)
+                for group in self._group_by(files, hashes):
+                    partial_groups.append((size, group))
+                    stats["partial_candidates"] += len(group)
+
+            # 阶段3: 完整哈希
+            for size, files in partial_groups:
+                if size <= 2 * SAMPLE_SIZE:
+                    # 首尾采样已覆盖整个文件
+                    hashes = [self._cached(f, size, "partial") for f in files]
+                else:
+                    hashes = self._hash_all(executor, files, size, "full", stats, dirty)
+                for group in self._group_by(files, hashes):
+                    groups.append({
+                        "size": size,
+                        "hash": hashes[files.index(group[0])],
+                        "paths": [f[0] for f in group]
+                    })
+
+        self._save_cache(dirty)
+        groups.sort(key=lambda g: g["size"] * (len(g["paths"]) - 1), reverse=True)
+        reclaimable = sum(g["size"] * (len(g["paths"]) - 1) for g in groups)
+        stats["seconds"] = time.monotonic() - started
+        self.logger.info(f"Duplicate scan finished: {len(groups)} groups, "
+                         f"{reclaimable} bytes reclaimable, {stats}")
+        return {"groups": groups, "reclaimable_bytes": reclaimable, "stats": stats}
+
+    def _stat_files(self, paths: List[str], size: int) -> List[Tuple[str, int, int, int]]:
+        """获取文件的 (路径, 设备, inode, 修改时间)，过滤已变化的文件和重复的硬链接"""
+        files = []
+        seen = set()
+        for path in paths:
+            try:
+                st = os.stat(path, follow_symlinks=False)
+            except OSError:
+                continue
+            if st.st_size != size or (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            files.append((path, st.st_dev, st.st_ino, st.st_mtime_ns))
+        return files
+
+    def _cached(self, file: Tuple[str, int, int, int], size: int, kind: str) -> Optional[str]:
+        """获取缓存的哈希，文件已修改时返回None"""
+        entry = self._cache.get((file[1], file[2]))
+        if entry is None or entry[0] != file[3] or entry[1] != size:
+            return None
+        return entry[2] if kind == "partial" else entry[3]
+
+    def _hash_all(self, executor, files: List[Tuple[str, int, int, int]], size: int,
+                  kind: str, stats: Dict, dirty: Dict) -> List[Optional[str]]:
+        """计算一组文件的哈希，优先使用缓存"""
+        hashes = [self._cached(f, size, kind) for f in files]
+        stats["cache_hits"] += sum(1 for h in hashes if h is not None)
+        func = self._partial_hash if kind == "partial" else self._full_hash
+        pending = {i: executor.submit(func, files[i][0]) for i, h in enumerate(hashes) if h is None}
+        for i, future in pending.items():
+            digest = future.result()
+            hashes[i] = digest
+            if digest is None:
+                continue
+            if kind == "full":
+                stats["full_hashed"] += 1
+            _, dev, ino, mtime_ns = files[i]
+            entry = self._cache.get((dev, ino))
+            if entry is None or entry[0] != mtime_ns or entry[1] != size:
+                entry = [mtime_ns, size, None, None]
+                self._cache[(dev, ino)] = entry
+            entry[2 if kind == "partial" else 3] = digest
+            dirty[(dev, ino)] = entry
+        return hashes
+
+    @staticmethod
+    def _group_by(files: List, hashes: List[Optional[str]]) -> List[List]:
+        """按哈希分组，只保留至少两个文件的分组"""
+        buckets: Dict[str, List] = {}
+        for file, digest in zip(files, hashes):
+            if digest is not None:
+                buckets.setdefault(digest, []).append(file)
+        return [group for group in buckets.values() if len(group) > 1]
+
+    def _partial_hash(self, path: str) -> Optional[str]:
+        """计算文件首尾各64KiB的哈希"""
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                digest = hashlib.blake2b(f.read(SAMPLE_SIZE), digest_size=16)
+                if size > SAMPLE_SIZE:
+                    tail = max(SAMPLE_SIZE, size - SAMPLE_SIZE)
+                    digest.update(os.pread(f.fileno(), SAMPLE_SIZE, tail))
+            return digest.hexdigest()
+        except OSError as e:
+            self.logger.debug(f"Cannot hash {path}: {str(e)}")
+            return None
+
+    def _full_hash(self, path: str) -> Optional[str]:
+        """通过mmap计算完整文件的哈希"""
+        try:
+            with open(path, 'rb') as f:
+                digest = hashlib.blake2b(digest_size=32)
+                if os.fstat(f.fileno()).st_size == 0:
+                    return digest.hexdigest()
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, len(view), HASH_CHUNK):
+                            digest.update(view[offset:offset + HASH_CHUNK])
+                    finally:
+                        view.release()
+            return digest.hexdigest()
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"Cannot hash {path}: {str(e)}")
+            return None
+
+    def _save_cache(self, dirty: Dict[Tuple[int, int], List]):
+        """写回新计算的哈希"""
+        if not dirty:
+            return
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                    [(dev, ino, *entry) for (dev, ino), entry in dirty.items()]
+                )
+                self._conn.commit()
+        except Exception as e:
+            self.logger.error(f"Error saving hash cache: {str(e)}")
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,324 @@
+"""
+文件索引模块
+持久化目录修改时间和汇总大小，支持增量重扫描的磁盘分析
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .file_scanner import FileScanner, ScanEntry
+
+class DirRecord:
+    """目录索引记录"""
+    __slots__ = ('parent', 'mtime_ns', 'own_size', 'total_size', 'prev_total')
+
+    def __init__(self, parent: Optional[str], mtime_ns: int, own_size: int,
+                 total_size: Optional[int] = None, prev_total: Optional[int] = None):
+        self.parent = parent
+        self.mtime_ns = mtime_ns
+        self.own_size = own_size  # 目录下直接文件的大小之和
+        self.total_size = total_size  # 包含所有子目录的汇总大小，None表示尚未汇总
+        self.prev_total = prev_total  # 上一次更新时的汇总大小
+
+class FileIndex:
+    """
+    文件大小索引
+
+    目录修改时间未变时复用索引中的文件列表，不再逐个stat文件；
+    子目录的变化不会更新祖先目录的修改时间，因此仍会对已知子目录各做一次stat。
+    目录按层分发到线程池中stat和扫描，索引写入在调用线程中进行；
+    外层根目录遍历时同样增量更新其下的其他索引根目录；遍历不到的索引根目录
+    (如位于其他文件系统的 /home)仍然存在时，其子树不会被外层根目录当作已删除
+    """
+    def __init__(self, db_path: Optional[str] = None, scanner: Optional[FileScanner] = None):
+        self.logger = logging.getLogger(__name__)
+        self._db_path = Path(db_path) if db_path else Path("data") / "file_index.db"
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.scanner = scanner or FileScanner()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+        self._init_db()
+        self._dirs = self._load_dirs()
+        self._roots = self._load_roots()
+
+    def _init_db(self):
+        """初始化数据表"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path TEXT PRIMARY KEY,
+                    parent TEXT,
+                    mtime_ns INTEGER NOT NULL,
+                    own_size INTEGER NOT NULL,
+                    total_size INTEGER NOT NULL,
+                    prev_total INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    dir TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_files_size ON files(size)")
+            self._conn.commit()
+
+    def _load_dirs(self) -> Dict[str, DirRecord]:
+        """加载目录索引"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, parent, mtime_ns, own_size, total_size, prev_total FROM dirs"
+            ).fetchall()
+        return {row[0]: DirRecord(*row[1:]) for row in rows}
+
+    def _load_roots(self) -> Set[str]:
+        """加载已索引的根目录"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM roots").fetchall()
+        return {row[0] for row in rows}
+
+    def update(self, roots: Iterable[str], full: bool = False) -> Dict:
+        """
+        增量更新索引
+
+        Args:
+            roots: 需要索引的目录
+            full: 是否忽略修改时间强制重新扫描
+
+        Returns:
+            更新统计
+        """
+        started = time.monotonic()
+        stats = {"scanned_dirs": 0, "reused_dirs": 0, "removed_dirs": 0}
+        children: Dict[str, List[str]] = {}
+        for path, record in self._dirs.items():
+            if record.parent is not None:
+                children.setdefault(record.parent, []).append(path)
+
+        # 先更新内层根目录，外层根目录汇总时使用其最新大小
+        roots = sorted({os.path.abspath(root) for root in roots}, key=len, reverse=True)
+        try:
+            with self._lock, self._conn, \
+                    ThreadPoolExecutor(max_workers=self.scanner.max_workers,
+                                       thread_name_prefix="file-index") as executor:
+                for root in roots:
+                    if self.scanner.is_excluded(root):
+                        continue
+                    try:
+                        root_dev = os.stat(root).st_dev
+                    except OSError:
+                        continue
+                    if root not in self._roots:
+                        self._roots.add(root)
+                        self._conn.execute("INSERT OR IGNORE INTO roots VALUES (?)", (root,))
+                    parent = self._dirs[root].parent if root in self._dirs else None
+                    visited = self._update_tree(root, parent, root_dev, full, children,
+                                                stats, executor)
+                    self._remove_stale(root, visited, stats)
+                    self._rollup(visited, children)
+        except Exception as e:
+            self.logger.error(f"Error updating file index: {str(e)}")
+
+        stats["seconds"] = time.monotonic() - started
+        self.logger.info(f"File index updated: {stats}")
+        return stats
+
+    def _update_tree(self, root: str, root_parent: Optional[str], root_dev: int, full: bool,
+                     children: Dict[str, List[str]], stats: Dict,
+                     executor: ThreadPoolExecutor) -> List[str]:
+        """逐层遍历目录树，返回按层序排列的已访问目录"""
+        visited = []
+        level = [(root, root_parent)]
+        while level:
+            known = []
+            for path, _ in level:
+                record = self._dirs.get(path)
+                known.append(None if full or record is None else record.mtime_ns)
+            results = executor.map(lambda item: self._probe(item[0], item[1], root_dev),
+                                   zip([path for path, _ in level], known))
+
+            next_level = []
+            for (path, parent), result in zip(level, results):
+                if result is None:
+                    continue
+                mtime_ns, scanned = result
+                if scanned is None:
+                    subdirs = children.get(path, [])
+                    stats["reused_dirs"] += 1
+                else:
+                    files, subdirs = scanned
+                    self._store_dir(path, parent, mtime_ns, files)
+                    children[path] = subdirs
+                    stats["scanned_dirs"] += 1
+
+                visited.append(path)
+                next_level.extend((subdir, path) for subdir in subdirs)
+            level = next_level
+        return visited
+
+    def _probe(self, path: str, known_mtime_ns: Optional[int], root_dev: int
+               ) -> Optional[Tuple[int, Optional[Tuple[List[ScanEntry], List[str]]]]]:
+        """
+        在线程池中检查单个目录
+
+        Returns:
+            (修改时间, 扫描结果)，修改时间未变时扫描结果为None，目录不存在时返回None
+        """
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None
+        if st.st_mtime_ns == known_mtime_ns:
+            return st.st_mtime_ns, None
+        return st.st_mtime_ns, self.scanner.scan_directory(path, root_dev)
+
+    def _store_dir(self, path: str, parent: Optional[str], mtime_ns: int,
+                   files: List[ScanEntry]):
+        """将重新扫描的目录写入索引"""
+        self._conn.execute("DELETE FROM files WHERE dir=?", (path,))
+        self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                               [(f.path, path, f.size, f.mtime) for f in files])
+
+        own_size = sum(f.size for f in files)
+        record = self._dirs.get(path)
+        if record is None:
+            self._dirs[path] = DirRecord(parent, mtime_ns, own_size)
+        else:
+            record.parent = parent
+            record.mtime_ns = mtime_ns
+            record.own_size = own_size
+
+    def _remove_stale(self, root: str, visited: List[str], stats: Dict):
+        """删除已不存在的目录记录，未被遍历但仍存在的其他索引根目录及其子树不受影响"""
+        prefix = root.rstrip(os.sep) + os.sep
+        seen = set(visited)
+        nested = []
+        for other in [r for r in self._roots if r.startswith(prefix) and r not in seen]:
+            if os.path.isdir(other):
+                nested.append(other.rstrip(os.sep) + os.sep)
+            else:
+                self._roots.discard(other)
+                self._conn.execute("DELETE FROM roots WHERE path=?", (other,))
+        nested = tuple(nested)
+        stale = [
+            path for path in self._dirs
+            if path not in seen and (path == root or path.startswith(prefix))
+            and not (path + os.sep).startswith(nested)
+        ]
+        for path in stale:
+            del self._dirs[path]
+        self._conn.executemany("DELETE FROM dirs WHERE path=?", [(p,) for p in stale])
+        self._conn.executemany("DELETE FROM files WHERE dir=?", [(p,) for p in stale])
+        stats["removed_dirs"] += len(stale)
+
+    def _rollup(self, visited: List[str], children: Dict[str, List[str]]):
+        """自底向上汇总目录大小"""
+        rows = []
+        for path in reversed(visited):
+            record = self._dirs[path]
+            total = record.own_size + sum(
+                self._dirs[child].total_size or 0 for child in children.get(path, [])
+                if child in self._dirs
+            )
+            # 新目录没有历史大小，不计入增长
+            record.prev_total = record.total_size if record.total_size is not None else total
+            record.total_size = total
+            rows.append((path, record.parent, record.mtime_ns, record.own_size,
+                         record.total_size, record.prev_total))
+        self._conn.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def get_directory_size(self, path: str) -> Optional[int]:
+        """获取目录的汇总大小，未索引返回None"""
+        record = self._dirs.get(os.path.abspath(path))
+        return record.total_size if record else None
+
+    def get_directory_usage(self, path: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        获取子目录大小汇总(类似du)
+
+        Args:
+            path: 目录
+            limit: 返回数量限制
+
+        Returns:
+            按大小降序排列的子目录列表
+        """
+        path = os.path.abspath(path)
+        usage = [
+            {"path": child, "size": record.total_size}
+            for child, record in self._dirs.items() if record.parent == path
+        ]
+        usage.sort(key=lambda x: x["size"], reverse=True)
+        return usage[:limit] if limit else usage
+
+    def largest_files(self, limit: int = 20, min_size: int = 0,
+                      root: Optional[str] = None) -> List[Dict]:
+        """从索引中获取最大的文件"""
+        sql = "SELECT path, size FROM files WHERE size >= ?"
+        params: list = [min_size]
+        if root:
+            root = os.path.abspath(root)
+            prefix = root.rstrip(os.sep) + os.sep
+            sql += " AND (dir = ? OR substr(dir, 1, ?) = ?)"
+            params += [root, len(prefix), prefix]
+        sql += " ORDER BY size DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{"path": path, "size": size} for path, size in rows]
+
+    def get_size_collisions(self, min_size: int = 1,
+                            root: Optional[str] = None) -> Dict[int, List[str]]:
+        """
+        获取大小相同的文件分组，作为重复文件的候选
+        
+        Args:
+            min_size: 最小文件大小
+            root: 只在该目录下查找
+            
+        Returns:
+            {文件大小: 路径列表}，只包含至少两个文件的分组
+        """
+        where = "size >= ?"
+        params: list = [min_size]
+        if root:
+            root = os.path.abspath(root)
+            prefix = root.rstrip(os.sep) + os.sep
+            where += " AND (dir = ? OR substr(dir, 1, ?) = ?)"
+            params += [root, len(prefix), prefix]
+        sql = (f"SELECT size, path FROM files WHERE {where} AND size IN "
+               f"(SELECT size FROM files WHERE {where} GROUP BY size HAVING COUNT(*) > 1) "
+               f"ORDER BY size DESC")
+        with self._lock:
+            rows = self._conn.execute(sql, params + params).fetchall()
+        groups: Dict[int, List[str]] = {}
+        for size, path in rows:
+            groups.setdefault(size, []).append(path)
+        return groups
+        
+    def get_growth(self, limit: int = 20) -> List[Dict]:
+        """获取自上次更新以来增长最多的目录"""
+        growth = [
+            {"path": path, "size": record.total_size,
+             "growth": record.total_size - record.prev_total}
+            for path, record in self._dirs.items()
+            if record.total_size is not None and record.total_size > record.prev_total
+        ]
+        growth.sort(key=lambda x: x["growth"], reverse=True)
+        return growth[:limit]
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,197 @@
+"""
+文件扫描模块
+基于os.scandir的并行流式目录扫描，供清理和大文件查找共用
+"""
+import os
+import heapq
+import logging
+import psutil
+from typing import Iterable, Iterator, List, NamedTuple, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# 不应扫描的伪文件系统类型
+PSEUDO_FILESYSTEMS = frozenset({
+    'proc', 'sysfs', 'devtmpfs', 'devpts', 'cgroup', 'cgroup2', 'securityfs',
+    'debugfs', 'tracefs', 'pstore', 'bpf', 'configfs', 'fusectl', 'mqueue',
+    'hugetlbfs', 'autofs', 'binfmt_misc', 'efivarfs', 'selinuxfs',
+    'rpc_pipefs', 'nsfs'
+})
+
+class ScanEntry(NamedTuple):
+    """扫描到的文件"""
+    path: str
+    size: int
+    mtime: float
+    dev: int
+    ino: int
+
+class FileScanner:
+    """
+    并行流式文件扫描器
+
+    目录分发到线程池扫描，文件信息直接复用DirEntry.stat()的结果，
+    扫描结果以生成器形式逐个产出
+    """
+    def __init__(self, max_workers: int = 8, one_file_system: bool = True):
+        """
+        Args:
+            max_workers: 扫描线程数
+            one_file_system: 是否限制在起始目录所在的文件系统内(类似 du -x)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.one_file_system = one_file_system
+        self._excluded_mounts = self._get_pseudo_mountpoints()
+
+    def _get_pseudo_mountpoints(self) -> Set[str]:
+        """获取伪文件系统的挂载点"""
+        mounts = {'/proc', '/sys'}
+        try:
+            for partition in psutil.disk_partitions(all=True):
+                if partition.fstype in PSEUDO_FILESYSTEMS:
+                    mounts.add(partition.mountpoint)
+        except Exception as e:
+            self.logger.warning(f"Error reading mount table: {str(e)}")
+        return mounts
+
+    def is_excluded(self, path: str) -> bool:
+        """判断路径是否为伪文件系统挂载点"""
+        return path in self._excluded_mounts
+
+    def iter_files(self, roots: Iterable[str], min_size: int = 0,
+                   regular_only: bool = True) -> Iterator[ScanEntry]:
+        """
+        流式扫描文件
+
+        Args:
+            roots: 起始目录列表
+            min_size: 最小文件大小，小于该值的文件不产出
+            regular_only: 是否只产出常规文件，False时同时产出符号链接、FIFO、套接字等非目录项
+
+        Yields:
+            扫描到的文件
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                      thread_name_prefix="file-scan")
+        pending = {}
+        try:
+            for root in roots:
+                if not root or self.is_excluded(root):
+                    continue
+                try:
+                    root_dev = os.stat(root).st_dev
+                except OSError:
+                    continue
+                pending[executor.submit(self._scan_one, root, root_dev, min_size,
+                                        regular_only)] = root
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del pending[future]
+                    files, subdirs, root_dev = future.result()
+                    for subdir in subdirs:
+                        pending[executor.submit(self._scan_one, subdir, root_dev, min_size,
+                                                regular_only)] = subdir
+                    yield from files
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _scan_one(self, path: str, root_dev: int, min_size: int,
+                  regular_only: bool = True) -> Tuple[List[ScanEntry], List[str], int]:
+        """扫描单个目录，返回 (文件列表, 子目录列表, 起始设备号)"""
+        files, subdirs = self.scan_directory(path, root_dev, min_size, regular_only)
+        return files, subdirs, root_dev
+
+    def scan_directory(self, path: str, root_dev: int, min_size: int = 0,
+                       regular_only: bool = True) -> Tuple[List[ScanEntry], List[str]]:
+        """
+        扫描单个目录，不递归
+
+        Args:
+            path: 目录
+            root_dev: 起始目录所在的设备号，one_file_system时不返回其他设备上的子目录
+            min_size: 最小文件大小
+            regular_only: 是否只返回常规文件
+
+        Returns:
+            (文件列表, 子目录列表)，目录无法读取时均为空
+        """
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.is_excluded(entry.path):
+                                continue
+                            if self.one_file_system and \
+                                    entry.stat(follow_symlinks=False).st_dev != root_dev:
+                                continue
+                            subdirs.append(entry.path)
+                        elif not regular_only or entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            if st.st_size >= min_size:
+                                files.append(ScanEntry(entry.path, st.st_size, st.st_mtime,
+                                                       st.st_dev, st.st_ino))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files, subdirs
+
+    def largest_files(self, roots: Iterable[str], limit: int = 20,
+                      min_size: int = 0) -> List[ScanEntry]:
+        """
+        查找最大的文件
+
+        Args:
+            roots: 起始目录列表
+            limit: 返回数量
+            min_size: 最小文件大小
+
+        Returns:
+            按大小降序排列的文件列表
+        """
+        heap: List[Tuple[int, str, ScanEntry]] = []
+        for entry in self.iter_files(roots, min_size):
+            item = (entry.size, entry.path, entry)
+            if len(heap) < limit:
+                heapq.heappush(heap, item)
+            elif item[0] > heap[0][0]:
+                heapq.heapreplace(heap, item)
+        return [item[2] for item in sorted(heap, reverse=True)]
+
+    def delete_files(self, root: str, remove_dirs: bool = False) -> int:
+        """
+        删除目录下的所有文件，包括符号链接、FIFO和套接字，符号链接指向的目录不会被进入
+
+        Args:
+            root: 目录
+            remove_dirs: 是否同时删除清空后的子目录
+
+        Returns:
+            释放的字节数
+        """
+        freed = 0
+        for entry in self.iter_files([root], regular_only=False):
+            try:
+                os.remove(entry.path)
+                freed += entry.size
+            except OSError:
+                continue
+
+        if remove_dirs:
+            try:
+                for current, dirs, _ in os.walk(root, topdown=False):
+                    for name in dirs:
+                        try:
+                            os.rmdir(os.path.join(current, name))
+                        except OSError:
+                            continue
+            except Exception as e:
+                self.logger.error(f"Error removing directories under {root}: {str(e)}")
+        return freed
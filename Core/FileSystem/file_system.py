@@ -3,55 +3,559 @@
 负责文件的创建、读写和管理
 """
 import os
+import sys
+import mmap
+import stat
 import shutil
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
+from queue import Queue, Full, Empty
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 class FileNode:
-    """文件节点类"""
-    def __init__(self, name: str, is_directory: bool = False):
-        self.name = name
+    """
+    文件节点类
+    
+    使用__slots__并以整数秒保存时间戳，文件名经过驻留，降低大目录树的内存占用
+    """
+    __slots__ = ('name', 'is_directory', 'size', 'ctime', 'mtime', 'parent', 'children', 'loaded')
+    
+    def __init__(self, name: str, is_directory: bool = False, size: int = 0,
+                 ctime: int = 0, mtime: int = 0):
+        self.name = sys.intern(name)
         self.is_directory = is_directory
-        self.size = 0
-        self.created_time = datetime.now()
-        self.modified_time = datetime.now()
+        self.size = size
+        self.ctime = ctime  # 创建(元数据变更)时间，Unix时间戳
+        self.mtime = mtime  # 修改时间，Unix时间戳
         self.parent = None
         self.children = {} if is_directory else None
+        self.loaded = not is_directory  # 目录的子节点是否已加载
+        
+    @classmethod
+    def from_stat(cls, name: str, stats: os.stat_result) -> 'FileNode':
+        """根据stat结果创建节点"""
+        is_dir = stat.S_ISDIR(stats.st_mode)
+        mtime = int(stats.st_mtime)
+        ctime = int(stats.st_ctime)
+        if ctime == mtime:
+            ctime = mtime  # 两者相同时共享同一个int对象
+        return cls(name, is_dir, 0 if is_dir else stats.st_size, ctime, mtime)
+        
+    @property
+    def created_time(self) -> datetime:
+        """创建时间"""
+        return datetime.fromtimestamp(self.ctime)
+        
+    @property
+    def modified_time(self) -> datetime:
+        """修改时间"""
+        return datetime.fromtimestamp(self.mtime)
+        
+    def add_child(self, child: 'FileNode'):
+        """添加子节点"""
+        child.parent = self
+        self.children[child.name] = child
+
+class WriteBatch:
+    """
+    批量写入事务
+    
+    先并行写入同目录下的临时文件并fsync，全部成功后再逐个os.replace，
+    每个目录只fsync一次，最后一次性更新目录树；写入阶段失败时不会修改任何目标文件
+    """
+    def __init__(self, file_system: 'FileSystem', max_workers: int = 8, fsync: bool = True):
+        """
+        Args:
+            file_system: 所属文件系统
+            max_workers: 并行写入的线程数
+            fsync: 是否fsync文件和目录以保证崩溃一致性
+        """
+        self.file_system = file_system
+        self.max_workers = max_workers
+        self.fsync = fsync
+        self._writes: Dict[str, Union[str, bytes]] = {}
+        
+    def write(self, path: str, content: Union[str, bytes]):
+        """暂存一次写入，同一路径以最后一次为准"""
+        self._writes[FileSystem._normalize(path)] = content
+        
+    def __len__(self) -> int:
+        return len(self._writes)
+        
+    def __enter__(self) -> 'WriteBatch':
+        return self
+        
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self._writes.clear()
+        return False
+        
+    def commit(self) -> bool:
+        """
+        提交所有暂存的写入
+        
+        Returns:
+            是否全部提交成功
+        """
+        fs = self.file_system
+        writes, self._writes = self._writes, {}
+        if not writes:
+            return True
+            
+        targets = {key: fs._full_path(key) for key in writes}
+        directories = {os.path.dirname(path) for path in targets.values()}
+        temp_files: Dict[str, str] = {}
+        try:
+            for directory in directories:
+                os.makedirs(directory, exist_ok=True)
+                
+            # 阶段1: 并行写入临时文件
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    key: executor.submit(self._write_temp, targets[key], content)
+                    for key, content in writes.items()
+                }
+                for key, future in futures.items():
+                    try:
+                        temp_files[key] = future.result()
+                    except Exception as e:
+                        fs.logger.error(f"Error staging file {key}: {str(e)}")
+            if len(temp_files) != len(writes):
+                raise IOError("staging failed")
+                
+            # 阶段2: 原子替换，每个目录fsync一次
+            for key, temp_path in list(temp_files.items()):
+                os.replace(temp_path, targets[key])
+                del temp_files[key]
+            if self.fsync:
+                for directory in directories:
+                    self._fsync_directory(directory)
+        except Exception as e:
+            fs.logger.error(f"Error committing write batch: {str(e)}")
+            for temp_path in temp_files.values():
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return False
+        finally:
+            # 阶段3: 一次性更新目录树
+            with fs._tree_lock:
+                for key in writes:
+                    if key not in temp_files and os.path.exists(targets[key]):
+                        fs._update_file_tree(key)
+                        
+        fs.logger.info(f"Committed {len(writes)} files in {len(directories)} directories")
+        return True
+        
+    def _write_temp(self, target: str, content: Union[str, bytes]) -> str:
+        """在目标文件同目录下写入临时文件"""
+        directory, name = os.path.split(target)
+        temp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if self.fsync:
+                os.fsync(fd)
+        except Exception:
+            os.close(fd)
+            os.remove(temp_path)
+            raise
+        os.close(fd)
+        return temp_path
+        
+    @staticmethod
+    def _fsync_directory(directory: str):
+        """fsync目录使重命名持久化"""
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
 
 class FileSystem:
     """文件系统类"""
     
-    def __init__(self, root_path: str):
+    def __init__(self, root_path: str, prefetch: bool = False, prefetch_limit: int = 32,
+                 listing_cache_size: int = 256):
+        """
+        Args:
+            root_path: 根目录
+            prefetch: 是否启用后台预取，目录被访问后预先加载其子目录
+            prefetch_limit: 每次访问最多预取的子目录数
+            listing_cache_size: 目录列表缓存的目录数上限
+        """
         self.logger = logging.getLogger(__name__)
         self.root_path = root_path
         self.root = FileNode("/", True)
+        self.prefetch_limit = prefetch_limit
+        self._tree_lock = threading.RLock()
+        self._index: Dict[str, FileNode] = {"": self.root}  # 相对路径 -> 目录节点，文件经父目录查找
+        self._listing_cache: OrderedDict = OrderedDict()  # 相对路径 -> (目录mtime_ns, 列表)
+        self._listing_cache_size = listing_cache_size
+        self._scan_cancel = threading.Event()
+        self._prefetch_queue: Queue = Queue(maxsize=1024)
+        self._prefetch_thread: Optional[threading.Thread] = None
+        self._watcher = None
         self._init_file_system()
+        if prefetch:
+            self.start_prefetcher()
         
     def _init_file_system(self):
-        """初始化文件系统"""
+        """初始化文件系统，目录内容在首次访问时才加载"""
         self.logger.info(f"Initializing file system at {self.root_path}")
         if not os.path.exists(self.root_path):
             os.makedirs(self.root_path)
-        self._scan_directory(self.root_path, self.root)
+            
+    @staticmethod
+    def _normalize(path: str) -> str:
+        """规范化为索引使用的相对路径"""
+        return "/".join(part for part in path.split("/") if part)
+        
+    @staticmethod
+    def _child_key(parent_key: str, name: str) -> str:
+        """拼接子节点的相对路径"""
+        return f"{parent_key}/{name}" if parent_key else name
+        
+    def _full_path(self, key: str) -> str:
+        """相对路径转换为完整路径"""
+        return os.path.join(self.root_path, key) if key else self.root_path
         
-    def _scan_directory(self, path: str, node: FileNode):
-        """扫描目录"""
+    def _node_key(self, node: FileNode) -> Optional[str]:
+        """计算节点的相对路径，节点已脱离目录树时返回None"""
+        parts = []
+        while node is not self.root:
+            if node.parent is None:
+                return None
+            parts.append(node.name)
+            node = node.parent
+        return "/".join(reversed(parts))
+        
+    def _attach(self, parent: FileNode, parent_key: str, node: FileNode):
+        """挂载子节点，目录节点同时加入路径索引"""
+        key = self._child_key(parent_key, node.name)
+        old = parent.children.get(node.name)
+        if old is not None and old is not node:
+            self._unindex(old, key)
+        parent.add_child(node)
+        if node.is_directory:
+            self._index[key] = node
+            if node.loaded:
+                for child in node.children.values():
+                    if child.is_directory:
+                        self._attach(node, key, child)
+                
+    def _detach(self, parent: FileNode, parent_key: str, name: str) -> Optional[FileNode]:
+        """摘除子节点并从路径索引中移除其子树"""
+        node = parent.children.pop(name, None)
+        if node is not None:
+            self._unindex(node, self._child_key(parent_key, name))
+        return node
+        
+    def _unindex(self, node: FileNode, key: str):
+        """从路径索引中移除目录节点及其已加载的子目录"""
+        if not node.is_directory:
+            return
+        self._listing_cache.pop(key, None)
+        if self._index.get(key) is node:
+            del self._index[key]
+        if node.loaded:
+            for child in node.children.values():
+                if child.is_directory:
+                    self._unindex(child, self._child_key(key, child.name))
+                
+    def _invalidate_listing(self, key: str):
+        """使目录列表缓存失效"""
+        self._listing_cache.pop(key, None)
+            
+    def _load_children(self, node: FileNode, key: str) -> bool:
+        """
+        加载目录的直接子节点
+        
+        Returns:
+            本次是否执行了加载
+        """
+        if node.loaded:
+            return False
+            
+        path = self._full_path(key)
+        children = []
         try:
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                is_dir = os.path.isdir(item_path)
-                child_node = FileNode(item, is_dir)
-                child_node.parent = node
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        # 不跟随符号链接，链接作为普通节点，避免目录环
+                        children.append(FileNode.from_stat(entry.name, entry.stat(follow_symlinks=False)))
+                    except OSError:
+                        continue
+        except Exception as e:
+            self.logger.error(f"Error scanning directory {path}: {str(e)}")
+            
+        with self._tree_lock:
+            if not node.loaded:
+                for child in children:
+                    self._attach(node, key, child)
+                node.loaded = True
+        if self._watcher:
+            self._watcher.watch(node, path)
+        return True
+        
+    def get_node(self, path: str = "/") -> Optional[FileNode]:
+        """
+        获取路径对应的节点，按需加载沿途目录
+        
+        Args:
+            path: 相对于根目录的路径
+            
+        Returns:
+            节点，不存在返回None
+        """
+        key = self._normalize(path)
+        current = self._index.get(key)
+        if current is None:
+            # 文件不在索引中，从已加载的父目录中查找
+            parent_key, _, name = key.rpartition("/")
+            parent = self._index.get(parent_key)
+            if parent is not None and parent.loaded:
+                return parent.children.get(name)
+            current = self.root
+            current_key = ""
+            for part in key.split("/") if key else []:
+                if not current.is_directory:
+                    return None
+                self._load_children(current, current_key)
+                current = current.children.get(part)
+                if current is None:
+                    return None
+                current_key = self._child_key(current_key, part)
+            
+        if current.is_directory and self._load_children(current, key):
+            self._schedule_prefetch(current, key)
+        return current
+        
+    def scan(self, progress_callback: Optional[Callable[[int, int], None]] = None,
+             progress_interval: int = 1000) -> bool:
+        """
+        完整扫描整个目录树
+        
+        Args:
+            progress_callback: 进度回调，参数为 (已扫描目录数, 已发现条目数)
+            progress_interval: 每扫描多少个目录回调一次
+            
+        Returns:
+            是否完整扫描完成，被cancel_scan取消时返回False
+        """
+        self._scan_cancel.clear()
+        scanned_dirs = 0
+        entries = 0
+        stack = [(self.root, "")]
+        while stack:
+            if self._scan_cancel.is_set():
+                self.logger.info(f"File system scan cancelled after {scanned_dirs} directories")
+                return False
                 
-                if is_dir:
-                    self._scan_directory(item_path, child_node)
-                else:
-                    child_node.size = os.path.getsize(item_path)
+            node, key = stack.pop()
+            self._load_children(node, key)
+            scanned_dirs += 1
+            entries += len(node.children)
+            for child in list(node.children.values()):
+                if child.is_directory:
+                    stack.append((child, self._child_key(key, child.name)))
                     
-                node.children[item] = child_node
+            if progress_callback and scanned_dirs % progress_interval == 0:
+                progress_callback(scanned_dirs, entries)
+                
+        if progress_callback:
+            progress_callback(scanned_dirs, entries)
+        return True
+        
+    def cancel_scan(self):
+        """取消正在进行的完整扫描"""
+        self._scan_cancel.set()
+        
+    def start_prefetcher(self):
+        """启动后台预取线程"""
+        if self._prefetch_thread and self._prefetch_thread.is_alive():
+            return
+        self._prefetch_thread = threading.Thread(target=self._run_prefetcher,
+                                                 name="fs-prefetch", daemon=True)
+        self._prefetch_thread.start()
+        
+    def stop_prefetcher(self):
+        """停止后台预取线程"""
+        if self._prefetch_thread:
+            self._prefetch_queue.put(None)
+            self._prefetch_thread.join()
+            self._prefetch_thread = None
+            
+    def start_watcher(self, backend: str = "auto", **kwargs) -> bool:
+        """
+        启动文件变化监听，将外部修改增量同步到已加载的目录树
+        
+        Args:
+            backend: 监听后端 (auto, inotify, polling)
+            **kwargs: 传给监听器的参数
+            
+        Returns:
+            是否启动成功
+        """
+        from .file_watcher import create_watcher
+        
+        if self._watcher:
+            return True
+        try:
+            self._watcher = create_watcher(self, backend, **kwargs)
+            self._watcher.start()
+            for node, path in self.iter_loaded_directories():
+                self._watcher.watch(node, path)
+            self.logger.info(f"File watcher started: {type(self._watcher).__name__}")
+            return True
         except Exception as e:
-            self.logger.error(f"Error scanning directory {path}: {str(e)}")
+            self.logger.error(f"Error starting file watcher: {str(e)}")
+            self._watcher = None
+            return False
+            
+    def stop_watcher(self):
+        """停止文件变化监听"""
+        if self._watcher:
+            self._watcher.stop()
+            self._watcher = None
+            
+    def iter_loaded_directories(self) -> Iterable[Tuple[FileNode, str]]:
+        """遍历所有已加载的目录节点及其完整路径"""
+        with self._tree_lock:
+            return [
+                (node, self._full_path(key)) for key, node in self._index.items()
+                if node.is_directory and node.loaded
+            ]
+        
+    def node_path(self, node: FileNode) -> Optional[str]:
+        """计算节点的完整路径，节点已脱离目录树时返回None"""
+        key = self._node_key(node)
+        return None if key is None else self._full_path(key)
+        
+    def apply_changes(self, entries: Iterable[Tuple[FileNode, str]] = (),
+                      moves: Iterable[Tuple[FileNode, str, FileNode, str]] = (),
+                      rescans: Iterable[FileNode] = ()):
+        """
+        批量应用外部变化
+        
+        Args:
+            entries: 需要重新stat的 (父目录节点, 名称)，不存在则删除，存在则新增或更新
+            moves: 同一批次内成对的移动 (源父节点, 源名称, 目标父节点, 目标名称)
+            rescans: 需要整体重新读取的目录节点
+        """
+        with self._tree_lock:
+            for src_parent, src_name, dst_parent, dst_name in moves:
+                self._move_node(src_parent, src_name, dst_parent, dst_name)
+            for parent, name in entries:
+                parent_key = self._node_key(parent)
+                if parent_key is not None and parent.loaded:
+                    self._refresh_entry(parent, parent_key, name)
+            for node in rescans:
+                key = self._node_key(node)
+                if key is not None and node.loaded:
+                    self._refresh_directory(node, key)
+                    
+    def _refresh_entry(self, parent: FileNode, parent_key: str, name: str):
+        """重新stat单个条目并同步到目录树"""
+        self._invalidate_listing(parent_key)
+        key = self._child_key(parent_key, name)
+        try:
+            stats = os.stat(self._full_path(key), follow_symlinks=False)
+        except OSError:
+            self._detach(parent, parent_key, name)
+            return
+        self._upsert_child(parent, parent_key, name, stats)
+        
+    def _upsert_child(self, parent: FileNode, parent_key: str, name: str,
+                      stats: os.stat_result):
+        """根据stat结果新增或更新子节点"""
+        node = parent.children.get(name)
+        if node is None or node.is_directory != stat.S_ISDIR(stats.st_mode):
+            self._attach(parent, parent_key, FileNode.from_stat(name, stats))
+            return
+        node.mtime = int(stats.st_mtime)
+        node.ctime = int(stats.st_ctime)
+        if not node.is_directory:
+            node.size = stats.st_size
+            
+    def _refresh_directory(self, node: FileNode, key: str):
+        """重新读取目录，与已加载的子节点做差异同步"""
+        self._invalidate_listing(key)
+        path = self._full_path(key)
+        seen = set()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        self._upsert_child(node, key, entry.name, entry.stat(follow_symlinks=False))
+                        seen.add(entry.name)
+                    except OSError:
+                        continue
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.error(f"Error refreshing directory {path}: {str(e)}")
+            return
+        for name in [name for name in node.children if name not in seen]:
+            self._detach(node, key, name)
+            
+    def _move_node(self, src_parent: FileNode, src_name: str,
+                   dst_parent: FileNode, dst_name: str):
+        """移动节点，保留已加载的子树"""
+        src_key = self._node_key(src_parent)
+        dst_key = self._node_key(dst_parent)
+        node = None
+        if src_key is not None and src_parent.loaded:
+            self._invalidate_listing(src_key)
+            node = self._detach(src_parent, src_key, src_name)
+        if dst_key is None or not dst_parent.loaded:
+            return
+        if node is None:
+            self._refresh_entry(dst_parent, dst_key, dst_name)
+            return
+        self._invalidate_listing(dst_key)
+        node.name = sys.intern(dst_name)
+        self._attach(dst_parent, dst_key, node)
+        
+    def _schedule_prefetch(self, node: FileNode, key: str):
+        """将刚打开目录的子目录加入预取队列"""
+        if not self._prefetch_thread:
+            return
+        subdirs = [child for child in node.children.values()
+                   if child.is_directory and not child.loaded]
+        for child in subdirs[:self.prefetch_limit]:
+            try:
+                self._prefetch_queue.put_nowait((child, self._child_key(key, child.name)))
+            except Full:
+                break
+                
+    def _run_prefetcher(self):
+        """预取线程主循环"""
+        while True:
+            try:
+                item = self._prefetch_queue.get(timeout=1)
+            except Empty:
+                continue
+            if item is None:
+                break
+            node, key = item
+            self._load_children(node, key)
             
     def create_file(self, path: str, content: str = "") -> bool:
         """创建文件"""
@@ -105,6 +609,183 @@ class FileSystem:
             self.logger.error(f"Error writing to file {path}: {str(e)}")
             return False
             
+    def batch(self, max_workers: int = 8, fsync: bool = True) -> WriteBatch:
+        """
+        创建批量写入事务
+        
+        用法:
+            with fs.batch() as batch:
+                batch.write("a.txt", "content")
+        """
+        return WriteBatch(self, max_workers, fsync)
+        
+    def iter_chunks(self, path: str, chunk_size: int = 1024 * 1024, offset: int = 0,
+                    length: Optional[int] = None) -> Iterator[memoryview]:
+        """
+        分块读取文件，内存占用与文件大小无关
+        
+        复用同一个缓冲区读取，产出的memoryview在下一次迭代前有效，需要保留时请自行复制
+        
+        Args:
+            path: 文件路径
+            chunk_size: 块大小
+            offset: 起始偏移
+            length: 读取长度，None表示读到文件末尾
+            
+        Yields:
+            文件数据块
+        """
+        full_path = os.path.join(self.root_path, path.lstrip("/"))
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        remaining = length
+        try:
+            with open(full_path, 'rb', buffering=0) as f:
+                f.seek(offset)
+                while remaining is None or remaining > 0:
+                    size = chunk_size if remaining is None else min(chunk_size, remaining)
+                    read = f.readinto(view[:size])
+                    if not read:
+                        break
+                    if remaining is not None:
+                        remaining -= read
+                    yield view[:read]
+        except Exception as e:
+            self.logger.error(f"Error reading file {path}: {str(e)}")
+            
+    def read_range(self, path: str, offset: int, length: int) -> Optional[memoryview]:
+        """
+        通过mmap读取文件的指定范围，不复制数据
+        
+        返回的memoryview持有映射，释放后映射随之关闭
+        
+        Args:
+            path: 文件路径
+            offset: 起始偏移
+            length: 读取长度
+            
+        Returns:
+            数据视图，失败返回None
+        """
+        try:
+            full_path = os.path.join(self.root_path, path.lstrip("/"))
+            with open(full_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if offset >= size or length <= 0:
+                    return memoryview(b"")
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return memoryview(mapped)[offset:min(offset + length, size)]
+        except Exception as e:
+            self.logger.error(f"Error reading range of file {path}: {str(e)}")
+            return None
+            
+    def read_bytes(self, path: str) -> Optional[bytes]:
+        """读取文件的二进制内容"""
+        try:
+            full_path = os.path.join(self.root_path, path.lstrip("/"))
+            with open(full_path, 'rb') as f:
+                return f.read()
+        except Exception as e:
+            self.logger.error(f"Error reading file {path}: {str(e)}")
+            return None
+            
+    def write_bytes(self, path: str, data: Union[bytes, bytearray, memoryview],
+                    append: bool = False) -> bool:
+        """写入二进制内容，接受memoryview以避免复制"""
+        return self.write_stream(path, [data], append)
+        
+    def write_stream(self, path: str, chunks: Iterable[Union[bytes, bytearray, memoryview]],
+                     append: bool = False) -> bool:
+        """
+        流式写入文件
+        
+        Args:
+            path: 文件路径
+            chunks: 数据块迭代器
+            append: 是否追加写入
+            
+        Returns:
+            是否写入成功
+        """
+        try:
+            full_path = os.path.join(self.root_path, path.lstrip("/"))
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'ab' if append else 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    
+            self._update_file_tree(path)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error writing to file {path}: {str(e)}")
+            return False
+            
+    def copy_file(self, src: str, dst: str) -> bool:
+        """
+        在内核中复制文件，依次尝试copy_file_range、sendfile，最后回退到用户态复制
+        
+        Args:
+            src: 源文件路径
+            dst: 目标文件路径
+            
+        Returns:
+            是否复制成功，源和目标是同一文件时返回False
+        """
+        try:
+            src_path = os.path.join(self.root_path, src.lstrip("/"))
+            dst_path = os.path.join(self.root_path, dst.lstrip("/"))
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            with open(src_path, 'rb') as fsrc:
+                src_stats = os.fstat(fsrc.fileno())
+                # 目标与源是同一文件(含硬链接和符号链接)时，以'wb'打开会先截断源文件
+                try:
+                    dst_stats = os.stat(dst_path)
+                except FileNotFoundError:
+                    dst_stats = None
+                if dst_stats is not None and (dst_stats.st_dev, dst_stats.st_ino) == \
+                        (src_stats.st_dev, src_stats.st_ino):
+                    self.logger.error(f"Cannot copy file {src} to {dst}: same file")
+                    return False
+                with open(dst_path, 'wb') as fdst:
+                    self._copy_fd(fsrc, fdst, src_stats.st_size)
+                
+            self._update_file_tree(dst)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error copying file {src} to {dst}: {str(e)}")
+            return False
+            
+    def _copy_fd(self, fsrc, fdst, size: int):
+        """按可用的系统调用复制文件内容"""
+        src_fd = fsrc.fileno()
+        dst_fd = fdst.fileno()
+        copied = 0
+        for name in ('copy_file_range', 'sendfile'):
+            func = getattr(os, name, None)
+            if func is None:
+                continue
+            try:
+                if name == 'sendfile':
+                    # sendfile写入目标文件的当前偏移，copy_file_range使用显式偏移不会移动它
+                    os.lseek(dst_fd, copied, os.SEEK_SET)
+                while copied < size:
+                    if name == 'copy_file_range':
+                        sent = func(src_fd, dst_fd, size - copied, copied, copied)
+                    else:
+                        sent = func(dst_fd, src_fd, copied, size - copied)
+                    if sent == 0:
+                        break
+                    copied += sent
+                if copied >= size:
+                    return
+                # 提前返回0(如procfs等伪文件系统)时换下一种方式继续复制
+            except OSError:
+                # 跨文件系统或不支持时换下一种方式，从已复制的位置继续
+                continue
+        fsrc.seek(copied)
+        fdst.seek(copied)
+        shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+        
     def delete_file(self, path: str) -> bool:
         """删除文件"""
         try:
@@ -134,58 +815,102 @@ class FileSystem:
             return False
             
     def _update_file_tree(self, path: str, delete: bool = False):
-        """更新文件树结构"""
-        parts = path.strip("/").split("/")
-        current = self.root
-        
-        if delete:
-            # 删除节点
-            for part in parts[:-1]:
-                if part in current.children:
-                    current = current.children[part]
-            if parts[-1] in current.children:
-                del current.children[parts[-1]]
-        else:
-            # 添加或更新节点
-            for part in parts:
-                if part not in current.children:
-                    is_dir = os.path.isdir(os.path.join(self.root_path, "/".join(parts)))
-                    current.children[part] = FileNode(part, is_dir)
-                current = current.children[part]
+        """
+        更新文件树结构
+        
+        通过路径索引直接定位最近的已加载祖先，无需从根逐级查找；
+        未加载的目录在首次访问时会重新读取，无需更新
+        """
+        key = self._normalize(path)
+        parent_key = key.rpartition("/")[0]
+        
+        with self._tree_lock:
+            self._invalidate_listing(parent_key)
+            if delete:
+                # 删除节点
+                parent = self._index.get(parent_key)
+                if parent is not None and parent.loaded:
+                    self._detach(parent, parent_key, key.rpartition("/")[2])
+                return
                 
+            # 添加或更新节点：从最近的已索引祖先开始补齐缺失的中间目录
+            parts = key.split("/")
+            depth = len(parts) - 1
+            while depth > 0 and "/".join(parts[:depth]) not in self._index:
+                depth -= 1
+            current_key = "/".join(parts[:depth])
+            current = self._index[current_key]
+            for part in parts[depth:]:
+                if not current.loaded:
+                    return
+                child_key = self._child_key(current_key, part)
+                self._upsert_child(current, current_key, part, os.stat(self._full_path(child_key)))
+                current = current.children[part]
+                current_key = child_key
+                    
     def get_file_info(self, path: str) -> Optional[Dict]:
         """获取文件信息"""
         try:
             full_path = os.path.join(self.root_path, path.lstrip("/"))
-            if os.path.exists(full_path):
-                stats = os.stat(full_path)
-                return {
-                    'name': os.path.basename(path),
-                    'size': stats.st_size,
-                    'created_time': datetime.fromtimestamp(stats.st_ctime),
-                    'modified_time': datetime.fromtimestamp(stats.st_mtime),
-                    'is_directory': os.path.isdir(full_path)
-                }
+            stats = os.stat(full_path)
+            return {
+                'name': os.path.basename(path),
+                'size': stats.st_size,
+                'created_time': datetime.fromtimestamp(stats.st_ctime),
+                'modified_time': datetime.fromtimestamp(stats.st_mtime),
+                'is_directory': stat.S_ISDIR(stats.st_mode)
+            }
+        except FileNotFoundError:
             return None
         except Exception as e:
             self.logger.error(f"Error getting file info for {path}: {str(e)}")
             return None
             
     def list_directory(self, path: str = "/") -> List[Dict]:
-        """列出目录内容"""
+        """
+        列出目录内容
+        
+        目录修改时间未变化时直接返回缓存，否则通过一次scandir重新读取
+        """
         try:
-            full_path = os.path.join(self.root_path, path.lstrip("/"))
-            if os.path.exists(full_path) and os.path.isdir(full_path):
-                items = []
-                for item in os.listdir(full_path):
-                    item_path = os.path.join(full_path, item)
-                    items.append({
-                        'name': item,
-                        'is_directory': os.path.isdir(item_path),
-                        'size': os.path.getsize(item_path) if os.path.isfile(item_path) else 0
-                    })
-                return items
-            return []
+            key = self._normalize(path)
+            full_path = self._full_path(key)
+            try:
+                dir_stats = os.stat(full_path)
+            except FileNotFoundError:
+                return []
+            if not stat.S_ISDIR(dir_stats.st_mode):
+                return []
+                
+            with self._tree_lock:
+                cached = self._listing_cache.get(key)
+                if cached and cached[0] == dir_stats.st_mtime_ns:
+                    self._listing_cache.move_to_end(key)
+                    items = cached[1]
+                else:
+                    items = None
+            if items is not None:
+                return [dict(item) for item in items]
+                
+            items = []
+            with os.scandir(full_path) as it:
+                for entry in it:
+                    try:
+                        is_file = entry.is_file()
+                        items.append({
+                            'name': entry.name,
+                            'is_directory': entry.is_dir(),
+                            'size': entry.stat().st_size if is_file else 0
+                        })
+                    except OSError:
+                        continue
+                        
+            with self._tree_lock:
+                self._listing_cache[key] = (dir_stats.st_mtime_ns, items)
+                self._listing_cache.move_to_end(key)
+                while len(self._listing_cache) > self._listing_cache_size:
+                    self._listing_cache.popitem(last=False)
+            return [dict(item) for item in items]
         except Exception as e:
             self.logger.error(f"Error listing directory {path}: {str(e)}")
             return []
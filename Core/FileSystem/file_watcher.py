@@ -0,0 +1,231 @@
+"""
+文件监听模块
+监听已加载目录的外部变化并批量同步到FileSystem目录树
+"""
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# inotify事件掩码
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+class FileWatcher:
+    """文件监听器基类"""
+    def __init__(self, file_system, batch_window: float = 0.1):
+        """
+        Args:
+            file_system: 需要同步的FileSystem
+            batch_window: 批量合并事件的时间窗口(秒)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.file_system = file_system
+        self.batch_window = batch_window
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动监听线程"""
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="fs-watcher", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """停止监听线程"""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def watch(self, node, path: str):
+        """开始监听一个已加载的目录"""
+        raise NotImplementedError
+
+    def _run(self):
+        """监听主循环"""
+        raise NotImplementedError
+
+class InotifyWatcher(FileWatcher):
+    """基于Linux inotify的监听器"""
+    def __init__(self, file_system, batch_window: float = 0.1, max_batch: int = 10000):
+        super().__init__(file_system, batch_window)
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+        self.max_batch = max_batch
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._watches: Dict[int, object] = {}  # wd -> 目录节点，节点移动后路径自动随之变化
+        self._lock = threading.Lock()
+
+    def watch(self, node, path: str):
+        """为目录添加inotify监听"""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                self.logger.warning("inotify watch limit reached, consider raising "
+                                    "fs.inotify.max_user_watches")
+            else:
+                self.logger.debug(f"Cannot watch {path}: {os.strerror(err)}")
+            return
+        with self._lock:
+            self._watches[wd] = node
+
+    def stop(self):
+        """停止监听并关闭inotify"""
+        super().stop()
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+
+    def _run(self):
+        """读取事件并按时间窗口批量应用"""
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        while self.running:
+            if not poller.poll(500):
+                continue
+            events = []
+            deadline = time.monotonic() + self.batch_window
+            while len(events) < self.max_batch:
+                chunk = self._read()
+                if chunk:
+                    events.extend(chunk)
+                    continue
+                timeout = deadline - time.monotonic()
+                if timeout <= 0 or not poller.poll(int(timeout * 1000)):
+                    break
+            try:
+                self._apply(events)
+            except Exception as e:
+                self.logger.error(f"Error applying file events: {str(e)}")
+
+    def _read(self) -> List[Tuple[int, int, int, str]]:
+        """读取一批原始事件 (wd, mask, cookie, name)"""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        except OSError as e:
+            self.logger.error(f"Error reading inotify events: {str(e)}")
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, cookie, os.fsdecode(name)))
+        return events
+
+    def _apply(self, events: List[Tuple[int, int, int, str]]):
+        """合并一批事件后一次性应用到目录树"""
+        entries = {}
+        moved_from = {}
+        moves = []
+        rescans = []
+        with self._lock:
+            for wd, mask, cookie, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    rescans = [node for node in self._watches.values()]
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                node = self._watches.get(wd)
+                if node is None or not name:
+                    continue
+                if mask & IN_MOVED_FROM:
+                    moved_from[cookie] = (node, name)
+                elif mask & IN_MOVED_TO and cookie in moved_from:
+                    src_node, src_name = moved_from.pop(cookie)
+                    moves.append((src_node, src_name, node, name))
+                else:
+                    # 同一条目的多次事件只需重新stat一次
+                    entries[(id(node), name)] = (node, name)
+
+        # 未配对的移出事件视为删除
+        for node, name in moved_from.values():
+            entries[(id(node), name)] = (node, name)
+        self.file_system.apply_changes(entries.values(), moves, rescans)
+
+class PollingWatcher(FileWatcher):
+    """
+    轮询监听器
+
+    inotify不可用时使用，定期重新读取已加载的目录；
+    目录树按需加载，轮询开销只与已加载的目录数相关
+    """
+    def __init__(self, file_system, interval: float = 5.0, batch_window: float = 0.1):
+        super().__init__(file_system, batch_window)
+        self.interval = interval
+
+    def watch(self, node, path: str):
+        """轮询模式下每轮遍历所有已加载目录，无需单独注册"""
+
+    def _run(self):
+        """定期同步已加载的目录"""
+        while self.running:
+            deadline = time.monotonic() + self.interval
+            try:
+                nodes = [node for node, _ in self.file_system.iter_loaded_directories()]
+                self.file_system.apply_changes(rescans=nodes)
+            except Exception as e:
+                self.logger.error(f"Error polling file system: {str(e)}")
+            while self.running and time.monotonic() < deadline:
+                time.sleep(min(0.5, self.interval))
+
+def create_watcher(file_system, backend: str = "auto", **kwargs) -> FileWatcher:
+    """
+    创建文件监听器
+
+    Args:
+        file_system: 需要同步的FileSystem
+        backend: 监听后端 (auto, inotify, polling)，auto在inotify不可用时回退到轮询
+        **kwargs: 监听器参数
+
+    Returns:
+        文件监听器
+    """
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(file_system, **{k: v for k, v in kwargs.items()
+                                                  if k in ("batch_window", "max_batch")})
+        except (OSError, AttributeError) as e:
+            if backend == "inotify":
+                raise
+            logging.getLogger(__name__).info(f"inotify unavailable, falling back to polling: {str(e)}")
+    elif backend != "polling":
+        raise ValueError(f"Unknown watcher backend: {backend}")
+    return PollingWatcher(file_system, **{k: v for k, v in kwargs.items()
+                                          if k in ("interval", "batch_window")})
@@ -4,18 +4,62 @@
 """
 import os
 import sys
+import time
 import logging
+import threading
 import psutil
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional, Sequence
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+
+from Core.Process.process_refresher import ProcessRefresher, get_shared_refresher
+from Core.task_graph import TaskGraph
+
+class ServiceStartMode(Enum):
+    """服务启动方式"""
+    EAGER = 'eager'  # 内核启动时启动
+    DEFERRED = 'deferred'  # 内核启动完成后在后台启动
+    LAZY = 'lazy'  # 首次获取时启动
+
+class ServiceState(Enum):
+    """服务状态"""
+    REGISTERED = 'registered'
+    STARTING = 'starting'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STOPPED = 'stopped'
+
+class KernelService:
+    """内核服务"""
+    def __init__(self, name: str, factory: Callable, depends_on: List[str],
+                 mode: ServiceStartMode, pass_dependencies: bool):
+        self.name = name
+        self.factory = factory
+        self.depends_on = depends_on
+        self.mode = mode
+        self.pass_dependencies = pass_dependencies  # 是否以 {依赖名: 实例} 调用工厂函数
+        self.instance: Any = None
+        self.state = ServiceState.REGISTERED
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.thread: Optional[str] = None
+        self.lock = threading.Lock()
 
 class Kernel:
     """系统内核类，负责核心功能的调度和管理"""
     
-    def __init__(self):
+    def __init__(self, refresher: Optional[ProcessRefresher] = None):
         self.logger = logging.getLogger(__name__)
         self._init_logging()
+        self._refresher = refresher or get_shared_refresher()
         self._processes: Dict[int, psutil.Process] = {}
         self._system_status: Dict[str, Any] = {}
+        self._services: Dict[str, KernelService] = {}
+        self._boot_time: Optional[float] = None
+        self._startup_report: Dict[str, Any] = {}
+        self._deferred_thread: Optional[threading.Thread] = None
+        self._register_core_services()
         
     def _init_logging(self):
         """初始化日志系统"""
@@ -24,11 +68,16 @@ class Kernel:
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         
-    def start(self):
-        """启动内核"""
+    def start(self) -> bool:
+        """
+        启动内核
+        
+        Returns:
+            立即启动的服务是否全部启动成功
+        """
         self.logger.info("Starting kernel...")
         self._init_system_status()
-        self._start_core_services()
+        return self._start_core_services()
         
     def _init_system_status(self):
         """初始化系统状态"""
@@ -39,10 +88,268 @@ class Kernel:
             'running_processes': len(psutil.pids())
         }
         
-    def _start_core_services(self):
-        """启动核心服务"""
+    def _register_core_services(self):
+        """注册默认核心服务，模块在服务启动时才导入"""
+        def system_manager():
+            from Core.System.system_manager import SystemManager
+            return SystemManager()
+            
+        def memory_manager():
+            from Core.Memory.memory_manager import MemoryManager
+            return MemoryManager()
+            
+        def process_manager():
+            from Core.Process.process_manager import ProcessManager
+            return ProcessManager(refresher=self._refresher)
+            
+        def ai_system():
+            from Core.ai_system import AISystem
+            return AISystem()
+            
+        def learning_system():
+            from Intelligence.Learning.learning_system import LearningSystem
+            return LearningSystem()
+            
+        self.register_service('system_manager', system_manager)
+        self.register_service('memory_manager', memory_manager)
+        self.register_service('process_manager', process_manager)
+        # 机器学习相关服务导入和初始化较慢，不阻塞内核启动
+        self.register_service('ai_system', ai_system, mode=ServiceStartMode.DEFERRED)
+        self.register_service('learning_system', learning_system, mode=ServiceStartMode.LAZY)
+        
+    def register_service(
+        self,
+        name: str,
+        factory: Callable,
+        depends_on: Optional[List[str]] = None,
+        mode: ServiceStartMode = ServiceStartMode.EAGER,
+        pass_dependencies: bool = False,
+        replace: bool = False
+    ) -> bool:
+        """
+        注册内核服务
+        
+        依赖必须已经注册，因此服务按依赖顺序注册；替换服务时拒绝形成循环依赖
+        
+        Args:
+            name: 服务名称
+            factory: 创建服务实例的函数
+            depends_on: 依赖的服务，依赖会先于本服务启动，必须已注册
+            mode: 启动方式
+            pass_dependencies: 为True时以 {依赖名: 实例} 字典调用工厂函数
+            replace: 是否替换尚未启动的同名服务
+            
+        Returns:
+            是否注册成功
+        """
+        existing = self._services.get(name)
+        if existing is not None and (not replace or existing.state != ServiceState.REGISTERED):
+            self.logger.error(f"Service {name} already registered")
+            return False
+        depends_on = list(depends_on or [])
+        unknown = [dep for dep in depends_on if dep not in self._services]
+        if unknown:
+            self.logger.error(f"Service {name} depends on unknown services: {unknown}")
+            return False
+        cycle = self._find_cycle(name, depends_on)
+        if cycle:
+            self.logger.error(f"Circular service dependency: {' -> '.join(cycle)}")
+            return False
+        self._services[name] = KernelService(name, factory, depends_on, mode, pass_dependencies)
+        return True
+        
+    def _find_cycle(self, name: str, depends_on: List[str]) -> Optional[List[str]]:
+        """检查以depends_on注册name后是否存在经过name的循环依赖，返回循环路径"""
+        stack = [(dep, [name, dep]) for dep in depends_on]
+        seen = set()
+        while stack:
+            current, path = stack.pop()
+            if current == name:
+                return path
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend((dep, path + [dep]) for dep in self._services[current].depends_on)
+        return None
+        
+    def _start_core_services(self, max_workers: int = 4) -> bool:
+        """
+        启动核心服务
+        
+        立即启动的服务及其依赖按拓扑顺序并行启动，全部成功后延迟启动的服务在后台启动
+        
+        Returns:
+            立即启动的服务是否全部启动成功
+        """
         self.logger.info("Starting core services...")
-        # TODO: 实现核心服务启动逻辑
+        self._boot_time = time.monotonic()
+        eager = self._with_dependencies(
+            [name for name, service in self._services.items()
+             if service.mode == ServiceStartMode.EAGER]
+        )
+        if eager is None:
+            return False
+        self._startup_report = self._run_services("kernel-startup", eager, max_workers)
+        status = self._startup_report.get('status', {})
+        failed = [name for name in eager if status.get(name) != "success"]
+        if failed:
+            self.logger.error(f"Kernel startup failed, services not started: {failed}")
+            return False
+        self.logger.info(
+            f"Core services started in {self._startup_report.get('total_time', 0.0):.3f}s, "
+            f"critical path {self._startup_report.get('critical_path')}"
+        )
+        
+        deferred = [name for name, service in self._services.items()
+                    if service.mode == ServiceStartMode.DEFERRED]
+        if deferred:
+            self._deferred_thread = threading.Thread(
+                target=self._start_deferred, args=(deferred, max_workers),
+                name="kernel-deferred", daemon=True
+            )
+            self._deferred_thread.start()
+        return True
+            
+    def _start_deferred(self, names: List[str], max_workers: int):
+        """后台启动延迟服务"""
+        services = self._with_dependencies(names)
+        if services:
+            self._run_services("kernel-deferred", services, max_workers)
+            
+    def _with_dependencies(self, names: List[str]) -> Optional[List[str]]:
+        """补全服务的传递依赖，存在未注册的依赖时返回None"""
+        result = []
+        seen = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            if name not in self._services:
+                self.logger.error(f"Unknown service: {name}")
+                return None
+            seen.add(name)
+            result.append(name)
+            stack.extend(self._services[name].depends_on)
+        return result
+        
+    def _run_services(self, graph_name: str, names: List[str], max_workers: int) -> Dict[str, Any]:
+        """通过任务依赖图并行启动一组服务"""
+        graph = TaskGraph(graph_name)
+        for name in names:
+            graph.add_node(name, lambda name=name: self._ensure_started(name),
+                           self._services[name].depends_on)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=graph_name) as pool:
+            return graph.run(pool)
+            
+    def _ensure_started(self, name: str, chain: tuple = ()) -> Any:
+        """
+        启动服务(如尚未启动)并返回实例
+        
+        每个服务有独立的锁，并发获取同一服务时只创建一次；先持有本服务的锁，再递归获取依赖的锁，
+        加锁顺序总是从依赖者到被依赖者，依赖图无环(注册时已校验)，因此不会互相等待
+        """
+        if name in chain:
+            raise RuntimeError(f"Circular service dependency: {' -> '.join(chain + (name,))}")
+        service = self._services[name]
+        with service.lock:
+            if service.state == ServiceState.RUNNING:
+                return service.instance
+            if service.state == ServiceState.FAILED:
+                raise RuntimeError(f"Service {name} failed to start: {service.error}")
+                
+            dependencies = {dep: self._ensure_started(dep, chain + (name,))
+                            for dep in service.depends_on}
+            service.state = ServiceState.STARTING
+            service.thread = threading.current_thread().name
+            service.started_at = time.monotonic()
+            try:
+                if service.pass_dependencies:
+                    service.instance = service.factory(dependencies)
+                else:
+                    service.instance = service.factory()
+            except Exception as e:
+                service.state = ServiceState.FAILED
+                service.error = str(e)
+                service.finished_at = time.monotonic()
+                self.logger.error(f"Failed to start service {name}: {str(e)}")
+                raise
+            service.state = ServiceState.RUNNING
+            service.finished_at = time.monotonic()
+            self.logger.info(f"Service {name} started in "
+                             f"{service.finished_at - service.started_at:.3f}s")
+            return service.instance
+            
+    def get_service(self, name: str) -> Any:
+        """
+        获取服务实例，懒加载或尚未完成的延迟服务会在当前线程启动
+        
+        Args:
+            name: 服务名称
+            
+        Returns:
+            服务实例，未注册或启动失败返回None
+        """
+        if name not in self._services:
+            self.logger.error(f"Unknown service: {name}")
+            return None
+        try:
+            return self._ensure_started(name)
+        except Exception as e:
+            self.logger.error(f"Cannot get service {name}: {str(e)}")
+            return None
+            
+    def wait_for_services(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待延迟服务启动完成
+        
+        Returns:
+            是否已全部完成
+        """
+        if self._deferred_thread is not None:
+            self._deferred_thread.join(timeout)
+            return not self._deferred_thread.is_alive()
+        return True
+        
+    def get_startup_report(self) -> Dict[str, Any]:
+        """
+        获取服务启动时间线
+        
+        Returns:
+            各服务的启动方式、状态、相对内核启动的开始/结束时间和所在线程，
+            以及立即启动阶段的总耗时、关键路径和串行启动所需的时间
+        """
+        base = self._boot_time or 0.0
+        timeline = []
+        for service in self._services.values():
+            entry = {
+                'name': service.name,
+                'mode': service.mode.value,
+                'state': service.state.value,
+                'depends_on': service.depends_on,
+                'thread': service.thread,
+                'start': None,
+                'end': None,
+                'duration': None
+            }
+            if service.started_at is not None:
+                entry['start'] = service.started_at - base
+            if service.finished_at is not None:
+                entry['end'] = service.finished_at - base
+                entry['duration'] = service.finished_at - service.started_at
+            if service.state == ServiceState.FAILED:
+                entry['error'] = service.error
+            timeline.append(entry)
+        timeline.sort(key=lambda e: (e['start'] is None, e['start'] or 0.0))
+        
+        durations = self._startup_report.get('durations', {})
+        return {
+            'timeline': timeline,
+            'boot_time': self._startup_report.get('total_time', 0.0),
+            'critical_path': self._startup_report.get('critical_path', []),
+            'critical_path_time': self._startup_report.get('critical_path_time', 0.0),
+            'sequential_time': sum(durations.values())
+        }
         
     def get_system_status(self) -> Dict[str, Any]:
         """获取系统状态"""
@@ -55,16 +362,21 @@ class Kernel:
     def register_process(self, pid: int):
         """注册新进程"""
         try:
-            process = psutil.Process(pid)
-            self._processes[pid] = process
-            self.logger.info(f"Registered process {pid}")
-        except psutil.NoSuchProcess:
+            process = self._refresher.acquire(pid, owner=self)
+        except psutil.AccessDenied:
+            self.logger.error(f"Access denied to process {pid}")
+            return
+        if process is None:
             self.logger.error(f"Process {pid} not found")
+            return
+        self._processes[pid] = process
+        self.logger.info(f"Registered process {pid}")
             
     def unregister_process(self, pid: int):
         """注销进程"""
         if pid in self._processes:
             del self._processes[pid]
+            self._refresher.release(pid, owner=self)
             self.logger.info(f"Unregistered process {pid}")
             
     def get_process_info(self, pid: int) -> Dict[str, Any]:
@@ -72,18 +384,53 @@ class Kernel:
         if pid not in self._processes:
             return {}
             
-        process = self._processes[pid]
-        return {
-            'pid': pid,
-            'name': process.name(),
-            'status': process.status(),
-            'cpu_percent': process.cpu_percent(),
-            'memory_percent': process.memory_percent()
-        }
+        return self.refresh_processes([pid]).get(pid, {})
+        
+    def refresh_processes(
+        self,
+        pids: Optional[List[int]] = None,
+        attrs: Optional[Sequence[str]] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        批量刷新已注册进程的信息
+        
+        Args:
+            pids: 进程ID列表，None表示所有已注册进程
+            attrs: 需要的psutil属性，默认为名称、状态、CPU和内存占用
+            
+        Returns:
+            {进程ID: 进程信息}，已退出的进程会被注销
+        """
+        pids = list(self._processes) if pids is None else [p for p in pids if p in self._processes]
+        result = {}
+        for pid, info in self._refresher.refresh(pids, attrs).items():
+            if info is None:
+                self.logger.warning(f"Process {pid} no longer exists")
+                self.unregister_process(pid)
+                continue
+            info['pid'] = pid
+            result[pid] = info
+        return result
         
     def shutdown(self):
         """关闭内核"""
         self.logger.info("Shutting down kernel...")
-        # 清理资源
+        self.wait_for_services()
+        # 按启动的逆序停止服务
+        started = sorted(
+            (s for s in self._services.values() if s.state == ServiceState.RUNNING),
+            key=lambda s: s.finished_at, reverse=True
+        )
+        for service in started:
+            cleanup = getattr(service.instance, 'cleanup', None)
+            if callable(cleanup):
+                try:
+                    cleanup()
+                except Exception as e:
+                    self.logger.error(f"Error stopping service {service.name}: {str(e)}")
+            service.state = ServiceState.STOPPED
+            service.instance = None
+        # 清理资源，释放共享刷新器中本内核引用的进程句柄
         self._processes.clear()
+        self._refresher.release_all(self)
         self._system_status.clear()
@@ -0,0 +1,204 @@
+"""
+内存分配器模块
+基于伙伴系统模拟物理内存的分配、回收与碎片统计
+"""
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+class BuddyAllocator:
+    """
+    伙伴系统分配器
+
+    每个阶(order)维护一个空闲块集合，阶k的块大小为 min_block * 2^k；
+    分配时取不小于请求大小的最小空闲块并逐级拆分，释放时与伙伴块逐级合并；
+    非空的阶记录在位掩码中，查找可用块为O(1)
+    """
+    def __init__(self, total_size: int, min_block: int = 4096):
+        """
+        Args:
+            total_size: 管理的内存大小(字节)
+            min_block: 最小分配块大小(字节)，必须是2的幂
+        """
+        if min_block <= 0 or min_block & (min_block - 1):
+            raise ValueError("min_block must be a power of two")
+        self.logger = logging.getLogger(__name__)
+        self.min_block = min_block
+        self.total_size = total_size // min_block * min_block
+        self.max_order = max(0, (self.total_size // min_block).bit_length() - 1)
+        self._free: list = [set() for _ in range(self.max_order + 1)]  # 阶 -> 空闲块地址
+        self._nonempty = 0  # 第k位表示阶k有空闲块
+        self._allocated: Dict[int, Tuple[int, int, int]] = {}  # 地址 -> (阶, 请求大小, 所属进程)
+        self._owner_blocks: Dict[int, Set[int]] = {}  # 进程 -> 地址集合
+        self._owner_usage: Dict[int, int] = {}  # 进程 -> 请求字节数
+        self.free_bytes = 0
+        self.requested_bytes = 0
+        self._carve()
+
+    def _carve(self):
+        """将整个区域切分为按自身大小对齐的最大块"""
+        offset = 0
+        while offset < self.total_size:
+            order = self.max_order
+            while order > 0 and (offset % self._block_size(order) or
+                                 offset + self._block_size(order) > self.total_size):
+                order -= 1
+            self._push(order, offset)
+            self.free_bytes += self._block_size(order)
+            offset += self._block_size(order)
+
+    def _block_size(self, order: int) -> int:
+        return self.min_block << order
+
+    def _order_for(self, size: int) -> int:
+        """满足请求大小的最小阶"""
+        blocks = -(-max(size, 1) // self.min_block)
+        return (blocks - 1).bit_length()
+
+    def _push(self, order: int, address: int):
+        self._free[order].add(address)
+        self._nonempty |= 1 << order
+
+    def _pop(self, order: int) -> int:
+        address = self._free[order].pop()
+        if not self._free[order]:
+            self._nonempty &= ~(1 << order)
+        return address
+
+    def _discard(self, order: int, address: int) -> bool:
+        free = self._free[order]
+        if address not in free:
+            return False
+        free.remove(address)
+        if not free:
+            self._nonempty &= ~(1 << order)
+        return True
+
+    def allocate(self, size: int, owner: int) -> Optional[int]:
+        """
+        分配内存块
+
+        Args:
+            size: 请求大小(字节)
+            owner: 所属进程ID
+
+        Returns:
+            块起始地址，没有足够大的连续空闲块时返回None
+
+        Raises:
+            ValueError: 请求大小不是正数
+        """
+        if size <= 0:
+            raise ValueError(f"allocation size must be positive, got {size}")
+        order = self._order_for(size)
+        if order > self.max_order:
+            return None
+        available = self._nonempty >> order
+        if not available:
+            return None
+        current = order + (available & -available).bit_length() - 1
+        address = self._pop(current)
+
+        # 逐级拆分，高地址的一半放回空闲集合
+        while current > order:
+            current -= 1
+            self._push(current, address + self._block_size(current))
+
+        self._allocated[address] = (order, size, owner)
+        blocks = self._owner_blocks.get(owner)
+        if blocks is None:
+            blocks = self._owner_blocks[owner] = set()
+        blocks.add(address)
+        self._owner_usage[owner] = self._owner_usage.get(owner, 0) + size
+        self.free_bytes -= self._block_size(order)
+        self.requested_bytes += size
+        return address
+
+    def free(self, address: int) -> Optional[Tuple[int, int]]:
+        """
+        释放内存块并与空闲的伙伴块合并
+
+        Args:
+            address: 块起始地址
+
+        Returns:
+            (请求大小, 所属进程)，地址未分配时返回None
+        """
+        record = self._allocated.pop(address, None)
+        if record is None:
+            return None
+        order, size, owner = record
+
+        blocks = self._owner_blocks[owner]
+        blocks.discard(address)
+        self._owner_usage[owner] -= size
+        if not blocks:
+            del self._owner_blocks[owner]
+            del self._owner_usage[owner]
+        self.free_bytes += self._block_size(order)
+        self.requested_bytes -= size
+
+        while order < self.max_order:
+            buddy = address ^ self._block_size(order)
+            if not self._discard(order, buddy):
+                break
+            address = min(address, buddy)
+            order += 1
+        self._push(order, address)
+        return size, owner
+
+    def free_owner(self, owner: int) -> int:
+        """释放进程的全部内存块，返回释放的请求字节数"""
+        freed = 0
+        for address in list(self._owner_blocks.get(owner, ())):
+            freed += self.free(address)[0]
+        return freed
+
+    def owner_of(self, address: int) -> Optional[int]:
+        """获取地址所属的进程"""
+        record = self._allocated.get(address)
+        return record[2] if record else None
+
+    def owner_usage(self, owner: int) -> int:
+        """获取进程请求的内存字节数"""
+        return self._owner_usage.get(owner, 0)
+
+    def largest_free_block(self) -> int:
+        """最大空闲块大小"""
+        if not self._nonempty:
+            return 0
+        return self._block_size(self._nonempty.bit_length() - 1)
+
+    def get_fragmentation(self) -> Dict:
+        """
+        获取碎片统计
+
+        Returns:
+            外部碎片率 (1 - 最大空闲块/空闲总量)、
+            内部碎片率 (块内未使用字节/已分配块字节) 以及各阶空闲块数量
+        """
+        allocated_bytes = self.total_size - self.free_bytes
+        largest = self.largest_free_block()
+        return {
+            'total': self.total_size,
+            'free': self.free_bytes,
+            'allocated': allocated_bytes,
+            'requested': self.requested_bytes,
+            'largest_free_block': largest,
+            'external_fragmentation': 1 - largest / self.free_bytes if self.free_bytes else 0.0,
+            'internal_fragmentation': (1 - self.requested_bytes / allocated_bytes
+                                       if allocated_bytes else 0.0),
+            'allocations': len(self._allocated),
+            'free_blocks': {self._block_size(order): len(free)
+                            for order, free in enumerate(self._free) if free}
+        }
+
+    def reset(self):
+        """释放全部内存块"""
+        self._free = [set() for _ in range(self.max_order + 1)]
+        self._nonempty = 0
+        self._allocated.clear()
+        self._owner_blocks.clear()
+        self._owner_usage.clear()
+        self.free_bytes = 0
+        self.requested_bytes = 0
+        self._carve()
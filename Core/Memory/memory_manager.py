@@ -4,16 +4,25 @@
 """
 import psutil
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .allocator import BuddyAllocator
+from .page_replacement import addresses_to_pages, simulate
+from .process_memory import ProcessMemoryCollector
 
 class MemoryManager:
     """内存管理器类"""
     
-    def __init__(self):
+    def __init__(self, arena_size: Optional[int] = None, min_block: int = 4096):
+        """
+        Args:
+            arena_size: 模拟内存区域大小(字节)，默认为物理内存总量
+            min_block: 最小分配块大小(字节)
+        """
         self.logger = logging.getLogger(__name__)
-        self._memory_map: Dict[int, int] = {}  # 内存映射表
-        self._page_table: Dict[int, List[int]] = {}  # 页表
         self._init_memory_status()
+        self._allocator = BuddyAllocator(arena_size or self.memory.total, min_block)
+        self._process_memory = ProcessMemoryCollector()
         
     def _init_memory_status(self):
         """初始化内存状态"""
@@ -32,18 +41,20 @@ class MemoryManager:
         Returns:
             内存起始地址，分配失败返回None
         """
+        if size <= 0:
+            self.logger.error(f"Invalid allocation size for process {process_id}: {size} bytes")
+            return None
         if self.memory.available < size:
             self.logger.warning(f"Not enough memory for allocation: {size} bytes")
             self._try_memory_optimization()
             return None
             
         # 模拟内存分配
-        address = len(self._memory_map)
-        self._memory_map[address] = size
-        
-        if process_id not in self._page_table:
-            self._page_table[process_id] = []
-        self._page_table[process_id].append(address)
+        address = self._allocator.allocate(size, process_id)
+        if address is None:
+            self.logger.warning(f"No free block large enough for {size} bytes")
+            self._try_memory_optimization()
+            return None
         
         self.logger.info(f"Allocated {size} bytes at address {address} for process {process_id}")
         return address
@@ -56,29 +67,103 @@ class MemoryManager:
             address: 内存地址
             process_id: 进程ID
         """
-        if address in self._memory_map:
-            size = self._memory_map.pop(address)
-            if process_id in self._page_table:
-                self._page_table[process_id].remove(address)
-            self.logger.info(f"Freed {size} bytes at address {address} for process {process_id}")
+        owner = self._allocator.owner_of(address)
+        if owner is None:
+            return
+        if owner != process_id:
+            self.logger.warning(f"Address {address} belongs to process {owner}, not {process_id}")
+            return
+        size, _ = self._allocator.free(address)
+        self.logger.info(f"Freed {size} bytes at address {address} for process {process_id}")
+        
+    def free_process_memory(self, process_id: int) -> int:
+        """
+        释放进程的全部内存
+        
+        Args:
+            process_id: 进程ID
             
-    def _try_memory_optimization(self):
-        """尝试进行内存优化"""
-        # 实现内存优化策略
+        Returns:
+            释放的字节数
+        """
+        freed = self._allocator.free_owner(process_id)
+        if freed:
+            self.logger.info(f"Freed {freed} bytes for process {process_id}")
+        return freed
+            
+    def _try_memory_optimization(self) -> Dict:
+        """
+        尝试进行内存优化
+        
+        伙伴系统在释放时已即时合并空闲块，这里只记录碎片情况供容量规划参考
+        """
         self.logger.info("Attempting memory optimization...")
-        # TODO: 实现内存碎片整理
-        # TODO: 实现页面置换算法
+        fragmentation = self._allocator.get_fragmentation()
+        self.logger.info(
+            f"Free: {fragmentation['free']} bytes, "
+            f"largest free block: {fragmentation['largest_free_block']} bytes, "
+            f"external fragmentation: {fragmentation['external_fragmentation']:.1%}"
+        )
+        return fragmentation
         
     def get_process_memory_usage(self, process_id: int) -> int:
         """获取进程内存使用情况"""
-        if process_id not in self._page_table:
-            return 0
+        return self._allocator.owner_usage(process_id)
+        
+    def get_fragmentation(self) -> Dict:
+        """获取模拟内存的碎片统计"""
+        return self._allocator.get_fragmentation()
+        
+    def simulate_page_replacement(
+        self,
+        trace,
+        policies: Optional[Iterable[str]] = None,
+        frame_counts: Sequence[int] = (64,),
+        page_size: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        回放页面访问序列，比较各置换策略在不同页框数量下的命中率
+        
+        Args:
+            trace: 页号序列(NumPy数组或整数序列)
+            policies: 置换策略 (fifo, lru, clock, lfu, arc)，None表示全部
+            frame_counts: 需要评估的页框数量
+            page_size: 给定时trace视为内存地址，按该页大小转换为页号
             
-        total_size = 0
-        for address in self._page_table[process_id]:
-            if address in self._memory_map:
-                total_size += self._memory_map[address]
-        return total_size
+        Returns:
+            每个(策略, 页框数量)组合的命中统计
+        """
+        if page_size:
+            trace = addresses_to_pages(trace, page_size)
+        results = simulate(trace, policies, frame_counts)
+        for result in results:
+            self.logger.info(
+                f"Page replacement {result['policy']} with {result['frames']} frames: "
+                f"hit rate {result['hit_rate']:.2%}"
+            )
+        return results
+        
+    def get_process_memory_breakdown(self, pids: Optional[Iterable[int]] = None) -> Dict[int, Dict]:
+        """
+        获取进程实际内存占用
+        
+        Args:
+            pids: 进程ID列表，None表示所有进程
+            
+        Returns:
+            {进程ID: 包含rss、pss、uss、swap的统计}
+        """
+        return self._process_memory.collect(pids)
+        
+    def get_top_memory_consumers(self, limit: int = 10, key: str = 'pss') -> List[Dict]:
+        """
+        获取内存占用最多的进程
+        
+        Args:
+            limit: 返回数量
+            key: 排序字段 (rss, pss, uss, swap)
+        """
+        return self._process_memory.top_consumers(limit, key)
         
     def get_memory_status(self) -> Dict:
         """获取内存状态"""
@@ -93,6 +178,6 @@ class MemoryManager:
         
     def cleanup(self):
         """清理内存管理器"""
-        self._memory_map.clear()
-        self._page_table.clear()
+        self._allocator.reset()
+        self._process_memory.close()
         self.logger.info("Memory manager cleaned up")
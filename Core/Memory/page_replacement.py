@@ -0,0 +1,406 @@
+"""
+页面置换模块
+模拟固定数量物理页框下的页面置换，支持多种置换策略和访问序列回放
+"""
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+from collections import OrderedDict, deque
+
+import numpy as np
+
+class ReplacementPolicy:
+    """
+    页面置换策略基类
+
+    子类实现 _replay 对一段页号序列逐个模拟访问，返回命中次数
+    """
+    name = ""
+    # 连续重复访问同一页面是否不改变策略状态，为True时回放前先合并连续重复
+    repeat_invariant = False
+
+    def __init__(self, frames: int):
+        """
+        Args:
+            frames: 物理页框数量
+        """
+        if frames <= 0:
+            raise ValueError("frames must be positive")
+        self.frames = frames
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._init_state()
+
+    def _init_state(self):
+        """初始化页框状态"""
+        raise NotImplementedError
+
+    def _replay(self, pages: List[int]) -> int:
+        """模拟一段访问，返回命中次数并累计淘汰次数"""
+        raise NotImplementedError
+
+    def resident_pages(self) -> List[int]:
+        """当前驻留在页框中的页面"""
+        raise NotImplementedError
+
+    def access(self, page: int) -> bool:
+        """
+        访问一个页面
+
+        Returns:
+            是否命中
+        """
+        hit = self._replay([page]) == 1
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return hit
+
+    def replay(self, trace) -> Dict:
+        """
+        回放访问序列
+
+        Args:
+            trace: 页号序列，可为NumPy数组或任意整数序列
+
+        Returns:
+            本次回放的统计
+        """
+        pages = np.asarray(trace, dtype=np.int64).ravel()
+        total = len(pages)
+        repeats = 0
+        if self.repeat_invariant and total > 1:
+            # 连续重复访问必然命中且不改变状态，向量化地预先剔除
+            keep = np.empty(total, dtype=bool)
+            keep[0] = True
+            np.not_equal(pages[1:], pages[:-1], out=keep[1:])
+            pages = pages[keep]
+            repeats = total - len(pages)
+
+        evictions_before = self.evictions
+        started = time.perf_counter()
+        hits = self._replay(pages.tolist()) + repeats
+        elapsed = time.perf_counter() - started
+        self.hits += hits
+        self.misses += total - hits
+        return {
+            'policy': self.name,
+            'frames': self.frames,
+            'references': total,
+            'hits': hits,
+            'misses': total - hits,
+            'evictions': self.evictions - evictions_before,
+            'hit_rate': hits / total if total else 0.0,
+            'seconds': elapsed
+        }
+
+    def get_stats(self) -> Dict:
+        """获取累计统计"""
+        total = self.hits + self.misses
+        return {
+            'policy': self.name,
+            'frames': self.frames,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def reset(self):
+        """清空页框和统计"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._init_state()
+
+class FIFOPolicy(ReplacementPolicy):
+    """先进先出"""
+    name = "fifo"
+    repeat_invariant = True
+
+    def _init_state(self):
+        self._resident = set()
+        self._queue = deque()
+
+    def _replay(self, pages: List[int]) -> int:
+        resident, queue, frames = self._resident, self._queue, self.frames
+        hits = evictions = 0
+        for page in pages:
+            if page in resident:
+                hits += 1
+                continue
+            if len(queue) >= frames:
+                resident.remove(queue.popleft())
+                evictions += 1
+            resident.add(page)
+            queue.append(page)
+        self.evictions += evictions
+        return hits
+
+    def resident_pages(self) -> List[int]:
+        return list(self._queue)
+
+class LRUPolicy(ReplacementPolicy):
+    """最近最少使用，基于有序字典实现O(1)访问"""
+    name = "lru"
+    repeat_invariant = True
+
+    def _init_state(self):
+        self._pages: OrderedDict = OrderedDict()
+
+    def _replay(self, pages: List[int]) -> int:
+        cache, frames = self._pages, self.frames
+        move_to_end, popitem = cache.move_to_end, cache.popitem
+        hits = evictions = 0
+        for page in pages:
+            if page in cache:
+                move_to_end(page)
+                hits += 1
+                continue
+            cache[page] = None
+            if len(cache) > frames:
+                popitem(last=False)
+                evictions += 1
+        self.evictions += evictions
+        return hits
+
+    def resident_pages(self) -> List[int]:
+        return list(self._pages)
+
+class ClockPolicy(ReplacementPolicy):
+    """时钟算法(二次机会)"""
+    name = "clock"
+    repeat_invariant = True
+
+    def _init_state(self):
+        self._slots: List[int] = []  # 页框 -> 页号
+        self._referenced = bytearray()  # 页框 -> 访问位
+        self._where: Dict[int, int] = {}  # 页号 -> 页框
+        self._hand = 0
+
+    def _replay(self, pages: List[int]) -> int:
+        slots, referenced, where, frames = self._slots, self._referenced, self._where, self.frames
+        hand = self._hand
+        hits = evictions = 0
+        for page in pages:
+            slot = where.get(page)
+            if slot is not None:
+                referenced[slot] = 1
+                hits += 1
+                continue
+            if len(slots) < frames:
+                where[page] = len(slots)
+                slots.append(page)
+                referenced.append(1)
+                continue
+            while referenced[hand]:
+                referenced[hand] = 0
+                hand = hand + 1 if hand + 1 < frames else 0
+            del where[slots[hand]]
+            slots[hand] = page
+            where[page] = hand
+            referenced[hand] = 1
+            hand = hand + 1 if hand + 1 < frames else 0
+            evictions += 1
+        self._hand = hand
+        self.evictions += evictions
+        return hits
+
+    def resident_pages(self) -> List[int]:
+        return list(self._slots)
+
+class LFUPolicy(ReplacementPolicy):
+    """
+    最不经常使用
+
+    按访问频率分桶，每个桶是按最近访问排序的有序字典，淘汰最低频率中最久未用的页面，均为O(1)
+    """
+    name = "lfu"
+
+    def _init_state(self):
+        self._freq: Dict[int, int] = {}  # 页号 -> 访问次数
+        self._buckets: Dict[int, OrderedDict] = {}  # 访问次数 -> 页面
+        self._min_freq = 0
+
+    def _replay(self, pages: List[int]) -> int:
+        freq, buckets, frames = self._freq, self._buckets, self.frames
+        min_freq = self._min_freq
+        hits = evictions = 0
+        for page in pages:
+            count = freq.get(page)
+            if count is not None:
+                hits += 1
+                bucket = buckets[count]
+                del bucket[page]
+                if not bucket:
+                    del buckets[count]
+                    if min_freq == count:
+                        min_freq = count + 1
+                count += 1
+                freq[page] = count
+                bucket = buckets.get(count)
+                if bucket is None:
+                    bucket = buckets[count] = OrderedDict()
+                bucket[page] = None
+                continue
+            if len(freq) >= frames:
+                bucket = buckets[min_freq]
+                victim, _ = bucket.popitem(last=False)
+                if not bucket:
+                    del buckets[min_freq]
+                del freq[victim]
+                evictions += 1
+            freq[page] = 1
+            bucket = buckets.get(1)
+            if bucket is None:
+                bucket = buckets[1] = OrderedDict()
+            bucket[page] = None
+            min_freq = 1
+        self._min_freq = min_freq
+        self.evictions += evictions
+        return hits
+
+    def resident_pages(self) -> List[int]:
+        return list(self._freq)
+
+class ARCPolicy(ReplacementPolicy):
+    """
+    自适应替换缓存(ARC)
+
+    T1/T2分别保存访问过一次和多次的驻留页面，B1/B2保存它们最近被淘汰的页号；
+    幽灵列表命中时调整目标值p，在近期性和频率之间自适应
+    """
+    name = "arc"
+
+    def _init_state(self):
+        self._t1: OrderedDict = OrderedDict()
+        self._t2: OrderedDict = OrderedDict()
+        self._b1: OrderedDict = OrderedDict()
+        self._b2: OrderedDict = OrderedDict()
+        self._p = 0.0
+
+    def _replay(self, pages: List[int]) -> int:
+        t1, t2, b1, b2 = self._t1, self._t2, self._b1, self._b2
+        c = self.frames
+        p = self._p
+        hits = evictions = 0
+
+        for page in pages:
+            if page in t1:
+                del t1[page]
+                t2[page] = None
+                hits += 1
+                continue
+            if page in t2:
+                t2.move_to_end(page)
+                hits += 1
+                continue
+
+            if page in b1:
+                p = min(c, p + max(len(b2) / len(b1), 1))
+                in_b2 = False
+            elif page in b2:
+                p = max(0.0, p - max(len(b1) / len(b2), 1))
+                in_b2 = True
+            else:
+                l1 = len(t1) + len(b1)
+                if l1 == c:
+                    if len(t1) < c:
+                        b1.popitem(last=False)
+                        in_b2 = False
+                    else:
+                        t1.popitem(last=False)
+                        evictions += 1
+                        t1[page] = None
+                        continue
+                else:
+                    total = l1 + len(t2) + len(b2)
+                    if total < c:
+                        t1[page] = None
+                        continue
+                    if total >= 2 * c:
+                        b2.popitem(last=False)
+                    in_b2 = False
+                # 替换后作为新页面进入T1
+                evictions += self._evict(p, in_b2)
+                t1[page] = None
+                continue
+
+            # 幽灵列表命中：替换后进入T2
+            evictions += self._evict(p, in_b2)
+            if in_b2:
+                del b2[page]
+            else:
+                del b1[page]
+            t2[page] = None
+
+        self._p = p
+        self.evictions += evictions
+        return hits
+
+    def _evict(self, p: float, in_b2: bool) -> int:
+        """从T1或T2淘汰一个页面到对应的幽灵列表，返回淘汰数量"""
+        t1, t2 = self._t1, self._t2
+        if len(t1) + len(t2) < self.frames:
+            return 0
+        if t1 and (len(t1) > p or (in_b2 and len(t1) == p)):
+            victim, _ = t1.popitem(last=False)
+            self._b1[victim] = None
+        elif t2:
+            victim, _ = t2.popitem(last=False)
+            self._b2[victim] = None
+        else:
+            return 0
+        return 1
+
+    def resident_pages(self) -> List[int]:
+        return list(self._t1) + list(self._t2)
+
+POLICIES = {policy.name: policy for policy in
+            (FIFOPolicy, LRUPolicy, ClockPolicy, LFUPolicy, ARCPolicy)}
+
+def create_policy(name: str, frames: int) -> ReplacementPolicy:
+    """
+    创建页面置换策略
+
+    Args:
+        name: 策略名称 (fifo, lru, clock, lfu, arc)
+        frames: 物理页框数量
+
+    Returns:
+        置换策略
+    """
+    policy = POLICIES.get(name.lower())
+    if policy is None:
+        raise ValueError(f"Unknown replacement policy: {name}")
+    return policy(frames)
+
+def addresses_to_pages(addresses, page_size: int = 4096) -> np.ndarray:
+    """将内存地址序列转换为页号序列"""
+    return np.asarray(addresses, dtype=np.int64) // page_size
+
+def simulate(trace, policies: Optional[Iterable[str]] = None,
+             frame_counts: Sequence[int] = (64,)) -> List[Dict]:
+    """
+    用多种策略和页框数量回放同一访问序列，用于评估缓存容量
+
+    Args:
+        trace: 页号序列
+        policies: 策略名称，None表示全部策略
+        frame_counts: 需要评估的页框数量
+
+    Returns:
+        每个(策略, 页框数量)组合的回放统计
+    """
+    trace = np.asarray(trace, dtype=np.int64)
+    results = []
+    for name in policies or POLICIES:
+        for frames in frame_counts:
+            result = create_policy(name, frames).replay(trace)
+            logging.getLogger(__name__).debug(
+                f"{name} with {frames} frames: hit rate {result['hit_rate']:.2%}"
+            )
+            results.append(result)
+    return results
@@ -0,0 +1,153 @@
+"""
+进程内存统计模块
+读取 /proc/<pid>/smaps_rollup 获取进程的RSS、PSS、USS和交换分区占用
+"""
+import os
+import time
+import logging
+import threading
+import psutil
+from typing import Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+# smaps_rollup中需要的字段(kB)
+_ROLLUP_FIELDS = {
+    b'Rss:': 'rss',
+    b'Pss:': 'pss',
+    b'Private_Clean:': 'private_clean',
+    b'Private_Dirty:': 'private_dirty',
+    b'Private_Hugetlb:': 'private_hugetlb',
+    b'Swap:': 'swap',
+    b'SwapPss:': 'swap_pss'
+}
+
+class ProcessMemoryCollector:
+    """
+    进程内存采集器
+
+    Linux下并行读取各进程的smaps_rollup，其他平台或内核不支持时回退到psutil；
+    同一采样周期(ttl)内的重复查询直接返回缓存结果
+    """
+    def __init__(self, max_workers: int = 8, ttl: float = 2.0, proc_root: str = "/proc"):
+        """
+        Args:
+            max_workers: 并行读取的线程数
+            ttl: 缓存有效期(秒)
+            proc_root: proc文件系统路径
+        """
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        self.proc_root = proc_root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="smaps")
+        self._lock = threading.Lock()
+        self._cache: Dict[int, Dict] = {}
+        self._cache_time = 0.0
+        self._use_rollup = os.path.exists(os.path.join(proc_root, "self", "smaps_rollup"))
+        if not self._use_rollup:
+            self.logger.info("smaps_rollup unavailable, using psutil for process memory")
+
+    def read_process(self, pid: int) -> Optional[Dict]:
+        """
+        读取单个进程的内存统计
+
+        Args:
+            pid: 进程ID
+
+        Returns:
+            包含rss、pss、uss、swap(字节)的字典，进程不存在或无权限时返回None
+        """
+        if self._use_rollup:
+            return self._read_rollup(pid)
+        return self._read_psutil(pid)
+
+    def _read_rollup(self, pid: int) -> Optional[Dict]:
+        """解析smaps_rollup"""
+        base = os.path.join(self.proc_root, str(pid))
+        try:
+            with open(os.path.join(base, "smaps_rollup"), 'rb') as f:
+                data = f.read()
+            with open(os.path.join(base, "comm"), 'rb') as f:
+                name = f.read().strip().decode(errors='replace')
+        except OSError:
+            return None
+        if not data:
+            # 内核线程没有用户态内存映射
+            return None
+
+        values = dict.fromkeys(_ROLLUP_FIELDS.values(), 0)
+        for line in data.splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                key = _ROLLUP_FIELDS.get(parts[0])
+                if key:
+                    values[key] = int(parts[1]) * 1024
+        return {
+            'pid': pid,
+            'name': name,
+            'rss': values['rss'],
+            'pss': values['pss'],
+            'uss': values['private_clean'] + values['private_dirty'] + values['private_hugetlb'],
+            'swap': values['swap'],
+            'swap_pss': values['swap_pss']
+        }
+
+    def _read_psutil(self, pid: int) -> Optional[Dict]:
+        """通过psutil读取，部分平台不提供pss"""
+        try:
+            process = psutil.Process(pid)
+            info = process.memory_full_info()
+            return {
+                'pid': pid,
+                'name': process.name(),
+                'rss': info.rss,
+                'pss': getattr(info, 'pss', info.uss),
+                'uss': info.uss,
+                'swap': getattr(info, 'swap', 0),
+                'swap_pss': getattr(info, 'swap', 0)
+            }
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    def collect(self, pids: Optional[Iterable[int]] = None) -> Dict[int, Dict]:
+        """
+        采集进程内存统计
+
+        Args:
+            pids: 进程ID列表，None表示所有进程
+
+        Returns:
+            {进程ID: 内存统计}，无法读取的进程不包含在内
+        """
+        with self._lock:
+            if pids is None and time.monotonic() - self._cache_time < self.ttl:
+                return dict(self._cache)
+
+        targets = list(pids) if pids is not None else psutil.pids()
+        result = {}
+        for stats in self._executor.map(self.read_process, targets):
+            if stats is not None:
+                result[stats['pid']] = stats
+
+        if pids is None:
+            with self._lock:
+                self._cache = result
+                self._cache_time = time.monotonic()
+        return dict(result)
+
+    def top_consumers(self, limit: int = 10, key: str = 'pss') -> List[Dict]:
+        """
+        获取内存占用最多的进程
+
+        Args:
+            limit: 返回数量
+            key: 排序字段 (rss, pss, uss, swap)
+
+        Returns:
+            按占用降序排列的进程内存统计
+        """
+        stats = self.collect()
+        return sorted(stats.values(), key=lambda s: s[key], reverse=True)[:limit]
+
+    def close(self) -> None:
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
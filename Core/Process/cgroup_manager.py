@@ -0,0 +1,229 @@
+"""
+cgroup管理模块
+基于cgroup v2统计服务级别的CPU、内存和IO使用，并设置资源限制
+"""
+import os
+import time
+import logging
+from typing import Dict, List, Optional
+
+class CgroupManager:
+    """
+    cgroup v2管理器
+
+    所有cgroup以相对于挂载点的路径表示 (如 system.slice/nginx.service)，
+    挂载点和proc路径均可配置，便于在伪造的目录树上测试
+    """
+    def __init__(self, root: str = "/sys/fs/cgroup", proc_root: str = "/proc"):
+        """
+        Args:
+            root: cgroup v2挂载点，混合模式下自动使用其中的unified目录
+            proc_root: proc文件系统路径
+        """
+        self.logger = logging.getLogger(__name__)
+        unified = os.path.join(root, "unified")
+        if not os.path.exists(os.path.join(root, "cgroup.controllers")) and \
+                os.path.exists(os.path.join(unified, "cgroup.controllers")):
+            root = unified
+        self.root = os.path.abspath(root)
+        self.proc_root = proc_root
+        self._cpu_samples: Dict[str, tuple] = {}  # cgroup -> (usage_usec, 采样时间)
+
+    @property
+    def available(self) -> bool:
+        """是否挂载了cgroup v2"""
+        return os.path.exists(os.path.join(self.root, "cgroup.controllers"))
+
+    def _path(self, cgroup: str, filename: str = "") -> str:
+        """cgroup文件的绝对路径，拒绝挂载点之外的路径"""
+        path = os.path.normpath(os.path.join(self.root, cgroup.strip("/"), filename))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid cgroup path: {cgroup}")
+        return path
+
+    def _read(self, cgroup: str, filename: str) -> Optional[str]:
+        try:
+            with open(self._path(cgroup, filename)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _write(self, cgroup: str, filename: str, value: str) -> bool:
+        try:
+            with open(self._path(cgroup, filename), 'w') as f:
+                f.write(value)
+            self.logger.info(f"Set {filename} of {cgroup or '/'} to {value}")
+            return True
+        except OSError as e:
+            self.logger.error(f"Failed to set {filename} of {cgroup or '/'}: {str(e)}")
+            return False
+
+    def list_cgroups(self, parent: str = "", recursive: bool = False) -> List[str]:
+        """
+        列出子cgroup
+
+        Args:
+            parent: 父cgroup
+            recursive: 是否包含所有后代
+
+        Returns:
+            cgroup路径列表
+        """
+        result = []
+        stack = [parent.strip("/")]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(self._path(current)) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and \
+                                os.path.exists(os.path.join(entry.path, "cgroup.procs")):
+                            child = f"{current}/{entry.name}" if current else entry.name
+                            result.append(child)
+                            if recursive:
+                                stack.append(child)
+            except OSError:
+                continue
+        return sorted(result)
+
+    def cgroup_of(self, pid: int) -> Optional[str]:
+        """获取进程所属的cgroup v2路径"""
+        try:
+            with open(os.path.join(self.proc_root, str(pid), "cgroup")) as f:
+                for line in f:
+                    if line.startswith("0::"):
+                        return line[3:].strip().strip("/")
+        except OSError:
+            pass
+        return None
+
+    def get_pids(self, cgroup: str) -> List[int]:
+        """获取cgroup中的进程"""
+        content = self._read(cgroup, "cgroup.procs")
+        return [int(pid) for pid in content.split()] if content else []
+
+    def get_stats(self, cgroup: str) -> Dict:
+        """
+        读取cgroup的资源统计
+
+        Returns:
+            包含cpu(cpu.stat各字段，微秒)、memory_current、memory_high、memory_max、
+            cpu_max (配额, 周期) 和io(按设备及合计)的字典，缺失的文件对应字段不出现
+        """
+        stats: Dict = {}
+        content = self._read(cgroup, "cpu.stat")
+        if content:
+            stats['cpu'] = {key: int(value) for key, value in
+                            (line.split() for line in content.splitlines())}
+        content = self._read(cgroup, "memory.current")
+        if content:
+            stats['memory_current'] = int(content)
+        for filename in ("memory.high", "memory.max"):
+            content = self._read(cgroup, filename)
+            if content:
+                stats[filename.replace('.', '_')] = None if content == "max" else int(content)
+        content = self._read(cgroup, "cpu.max")
+        if content:
+            quota, period = content.split()
+            stats['cpu_max'] = (None if quota == "max" else int(quota), int(period))
+        content = self._read(cgroup, "io.stat")
+        if content is not None:
+            stats['io'] = self._parse_io_stat(content)
+        return stats
+
+    @staticmethod
+    def _parse_io_stat(content: str) -> Dict:
+        """解析io.stat，返回 {'devices': {设备: {字段: 值}}, 'total': {字段: 合计}}"""
+        devices = {}
+        total: Dict[str, int] = {}
+        for line in content.splitlines():
+            device, *fields = line.split()
+            values = {}
+            for field in fields:
+                key, _, value = field.partition('=')
+                values[key] = int(value)
+                total[key] = total.get(key, 0) + int(value)
+            devices[device] = values
+        return {'devices': devices, 'total': total}
+
+    def get_cpu_percent(self, cgroup: str) -> Optional[float]:
+        """
+        计算自上次调用以来cgroup的CPU使用率
+
+        Returns:
+            CPU使用率(%，100表示占满一个核)，首次调用返回None
+        """
+        content = self._read(cgroup, "cpu.stat")
+        if not content:
+            return None
+        usage = next((int(line.split()[1]) for line in content.splitlines()
+                      if line.startswith("usage_usec")), None)
+        if usage is None:
+            return None
+        now = time.monotonic()
+        previous = self._cpu_samples.get(cgroup)
+        self._cpu_samples[cgroup] = (usage, now)
+        if previous is None or now <= previous[1]:
+            return None
+        return (usage - previous[0]) / ((now - previous[1]) * 1e6) * 100
+
+    def top_cpu_cgroups(self, parent: str = "", limit: int = 5,
+                        interval: float = 0.5) -> List[Dict]:
+        """
+        获取CPU使用率最高的子cgroup
+
+        Args:
+            parent: 父cgroup
+            limit: 返回数量
+            interval: 没有历史采样时两次采样的间隔(秒)
+
+        Returns:
+            按CPU使用率降序排列的 {cgroup, cpu_percent}
+        """
+        cgroups = self.list_cgroups(parent)
+        if any(cgroup not in self._cpu_samples for cgroup in cgroups):
+            for cgroup in cgroups:
+                self.get_cpu_percent(cgroup)
+            time.sleep(interval)
+        usage = []
+        for cgroup in cgroups:
+            percent = self.get_cpu_percent(cgroup)
+            if percent is not None:
+                usage.append({'cgroup': cgroup, 'cpu_percent': percent})
+        usage.sort(key=lambda x: x['cpu_percent'], reverse=True)
+        return usage[:limit]
+
+    def set_cpu_max(self, cgroup: str, quota_us: Optional[int],
+                    period_us: int = 100000) -> bool:
+        """
+        设置cpu.max
+
+        Args:
+            cgroup: cgroup路径
+            quota_us: 每个周期可用的CPU时间(微秒)，None表示不限制
+            period_us: 周期(微秒)
+        """
+        quota = "max" if quota_us is None else str(int(quota_us))
+        return self._write(cgroup, "cpu.max", f"{quota} {int(period_us)}")
+
+    def set_cpu_limit(self, cgroup: str, cores: Optional[float],
+                      period_us: int = 100000) -> bool:
+        """按CPU核数设置cpu.max，None表示不限制"""
+        return self.set_cpu_max(cgroup, None if cores is None else cores * period_us, period_us)
+
+    def set_memory_high(self, cgroup: str, limit: Optional[int]) -> bool:
+        """设置memory.high (字节)，超过后内核会回收内存并限制分配速度，None表示不限制"""
+        return self._write(cgroup, "memory.high", "max" if limit is None else str(int(limit)))
+
+    def set_io_weight(self, cgroup: str, weight: int, device: Optional[str] = None) -> bool:
+        """
+        设置io.weight
+
+        Args:
+            cgroup: cgroup路径
+            weight: 权重 (1-10000，默认100)
+            device: 设备号 (如 8:0)，None表示默认权重
+        """
+        if not 1 <= weight <= 10000:
+            raise ValueError("io weight must be between 1 and 10000")
+        return self._write(cgroup, "io.weight", f"{device or 'default'} {weight}")
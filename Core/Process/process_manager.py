@@ -5,9 +5,13 @@
 import os
 import psutil
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
+from collections import deque
 from enum import Enum
 
+from .scheduling import create_policy, generate_arrivals, make_jobs, simulate, POLICIES
+from .process_refresher import ProcessRefresher, get_shared_refresher
+
 class ProcessState(Enum):
     """进程状态枚举"""
     CREATED = 'created'
@@ -16,21 +20,191 @@ class ProcessState(Enum):
     TERMINATED = 'terminated'
 
 class Process:
-    """进程类"""
+    """
+    进程类
+    
+    修改状态或优先级时同步更新所属进程表的索引
+    """
+    __slots__ = ('pid', 'name', '_state', '_priority', 'cpu_usage', 'memory_usage', '_table')
+    
     def __init__(self, pid: int, name: str):
+        self._table: Optional['ProcessTable'] = None
         self.pid = pid
         self.name = name
-        self.state = ProcessState.CREATED
-        self.priority = 0
+        self._state = ProcessState.CREATED
+        self._priority = 0
         self.cpu_usage = 0.0
         self.memory_usage = 0.0
+        
+    @property
+    def state(self) -> ProcessState:
+        return self._state
+        
+    @state.setter
+    def state(self, state: ProcessState):
+        if self._table is not None and state != self._state:
+            self._table.reindex(self, state, self._priority)
+        self._state = state
+        
+    @property
+    def priority(self) -> int:
+        return self._priority
+        
+    @priority.setter
+    def priority(self, priority: int):
+        if self._table is not None and priority != self._priority:
+            self._table.reindex(self, self._state, priority)
+        self._priority = priority
+
+class PidAllocator:
+    """
+    PID分配器
+    
+    优先分配从未使用过的PID，用尽后按释放顺序复用，分配和释放均为O(1)
+    """
+    def __init__(self, pid_max: int = 4194304):
+        """
+        Args:
+            pid_max: 最大PID
+        """
+        self.pid_max = pid_max
+        self._next = 1
+        self._free: deque = deque()
+        
+    def allocate(self) -> Optional[int]:
+        """分配PID，全部用尽时返回None"""
+        if self._next <= self.pid_max:
+            pid = self._next
+            self._next += 1
+            return pid
+        if self._free:
+            return self._free.popleft()
+        return None
+        
+    def release(self, pid: int):
+        """释放PID"""
+        self._free.append(pid)
+        
+    def reset(self):
+        """重置分配器"""
+        self._next = 1
+        self._free.clear()
+
+class ProcessTable:
+    """
+    进程表
+    
+    以PID为主索引，并按 (状态, 优先级) 维护二级索引，
+    按状态和优先级查询时只访问匹配的进程
+    """
+    def __init__(self):
+        self._processes: Dict[int, Process] = {}
+        # 状态 -> 优先级 -> {PID: 进程}
+        self._index: Dict[ProcessState, Dict[int, Dict[int, Process]]] = {
+            state: {} for state in ProcessState
+        }
+        
+    def __len__(self) -> int:
+        return len(self._processes)
+        
+    def __contains__(self, pid: int) -> bool:
+        return pid in self._processes
+        
+    def get(self, pid: int) -> Optional[Process]:
+        return self._processes.get(pid)
+        
+    def pids(self) -> List[int]:
+        return list(self._processes)
+        
+    def add(self, process: Process):
+        """加入进程表"""
+        self._processes[process.pid] = process
+        self._index_add(process, process.state, process.priority)
+        process._table = self
+        
+    def remove(self, pid: int) -> Optional[Process]:
+        """移出进程表"""
+        process = self._processes.pop(pid, None)
+        if process is not None:
+            self._index_remove(process, process.state, process.priority)
+            process._table = None
+        return process
+        
+    def reindex(self, process: Process, state: ProcessState, priority: int):
+        """进程状态或优先级变化时更新索引"""
+        self._index_remove(process, process.state, process.priority)
+        self._index_add(process, state, priority)
+        
+    def _index_add(self, process: Process, state: ProcessState, priority: int):
+        by_priority = self._index[state]
+        bucket = by_priority.get(priority)
+        if bucket is None:
+            bucket = by_priority[priority] = {}
+        bucket[process.pid] = process
+        
+    def _index_remove(self, process: Process, state: ProcessState, priority: int):
+        by_priority = self._index[state]
+        bucket = by_priority[priority]
+        del bucket[process.pid]
+        if not bucket:
+            del by_priority[priority]
+            
+    def iter_processes(
+        self,
+        state: Optional[ProcessState] = None,
+        priority: Optional[int] = None,
+        by_priority: bool = False
+    ) -> Iterator[Process]:
+        """
+        遍历进程
+        
+        Args:
+            state: 状态过滤
+            priority: 优先级过滤
+            by_priority: 是否按优先级从高到低遍历
+        """
+        if state is None and priority is None and not by_priority:
+            yield from self._processes.values()
+            return
+        states = [state] if state is not None else list(ProcessState)
+        if priority is not None:
+            for s in states:
+                yield from self._index[s].get(priority, {}).values()
+            return
+        if not by_priority:
+            for s in states:
+                for bucket in self._index[s].values():
+                    yield from bucket.values()
+            return
+        priorities = sorted({p for s in states for p in self._index[s]}, reverse=True)
+        for p in priorities:
+            for s in states:
+                yield from self._index[s].get(p, {}).values()
+                
+    def count(self, state: ProcessState) -> int:
+        """指定状态的进程数"""
+        return sum(len(bucket) for bucket in self._index[state].values())
+        
+    def clear(self):
+        for process in self._processes.values():
+            process._table = None
+        self._processes.clear()
+        for by_priority in self._index.values():
+            by_priority.clear()
 
 class ProcessManager:
     """进程管理器类"""
     
-    def __init__(self):
+    def __init__(self, pid_max: int = 4194304, refresher: Optional[ProcessRefresher] = None):
+        """
+        Args:
+            pid_max: 最大PID
+            refresher: 进程信息刷新器，默认使用共享的刷新器
+        """
         self.logger = logging.getLogger(__name__)
-        self._processes: Dict[int, Process] = {}
+        self._processes = ProcessTable()
+        self._pid_allocator = PidAllocator(pid_max)
+        self._refresher = refresher or get_shared_refresher()
         self._init_process_manager()
         
     def _init_process_manager(self):
@@ -51,12 +225,15 @@ class ProcessManager:
         try:
             # 在实际系统中，这里应该创建真实的系统进程
             # 这里仅作为示例实现
-            pid = max(self._processes.keys()) + 1 if self._processes else 1
+            pid = self._pid_allocator.allocate()
+            if pid is None:
+                self.logger.error("Failed to create process: no free PID")
+                return None
             process = Process(pid, name)
             process.priority = priority
             process.state = ProcessState.CREATED
             
-            self._processes[pid] = process
+            self._processes.add(process)
             self.logger.info(f"Created process {name} with PID {pid}")
             return process
         except Exception as e:
@@ -65,51 +242,132 @@ class ProcessManager:
             
     def terminate_process(self, pid: int):
         """终止进程"""
-        if pid in self._processes:
-            process = self._processes[pid]
+        process = self._processes.remove(pid)
+        if process is not None:
             process.state = ProcessState.TERMINATED
-            del self._processes[pid]
+            self._pid_allocator.release(pid)
+            self._refresher.release(pid, owner=self)
             self.logger.info(f"Terminated process {pid}")
             
     def get_process(self, pid: int) -> Optional[Process]:
         """获取进程信息"""
         return self._processes.get(pid)
         
-    def list_processes(self) -> List[Process]:
-        """获取所有进程列表"""
-        return list(self._processes.values())
-        
-    def update_process_status(self):
-        """更新所有进程状态"""
-        for pid, process in self._processes.items():
-            try:
-                # 获取实际系统进程信息
-                sys_process = psutil.Process(pid)
-                process.cpu_usage = sys_process.cpu_percent()
-                process.memory_usage = sys_process.memory_percent()
-            except psutil.NoSuchProcess:
-                self.logger.warning(f"Process {pid} no longer exists")
+    def list_processes(
+        self,
+        state: Optional[ProcessState] = None,
+        priority: Optional[int] = None
+    ) -> List[Process]:
+        """
+        获取进程列表
+        
+        Args:
+            state: 状态过滤
+            priority: 优先级过滤
+        """
+        return list(self._processes.iter_processes(state, priority))
+        
+    def iter_processes(
+        self,
+        state: Optional[ProcessState] = None,
+        priority: Optional[int] = None,
+        by_priority: bool = False
+    ) -> Iterator[Process]:
+        """
+        遍历进程，不复制进程表
+        
+        Args:
+            state: 状态过滤
+            priority: 优先级过滤
+            by_priority: 是否按优先级从高到低遍历
+        """
+        return self._processes.iter_processes(state, priority, by_priority)
+        
+    def update_process_status(self, attrs: Optional[List[str]] = None):
+        """
+        更新所有进程状态
+        
+        Args:
+            attrs: 额外需要刷新的psutil属性
+        """
+        processes = list(self._processes.iter_processes())
+        wanted = ['cpu_percent', 'memory_percent'] + list(attrs or [])
+        # 批量刷新实际系统进程信息，句柄跨调用保留，cpu_percent基于上次刷新计算
+        pids = [p.pid for p in processes]
+        self._refresher.retain(pids, owner=self)
+        info = self._refresher.refresh(pids, wanted)
+        for process in processes:
+            values = info.get(process.pid)
+            if values is None:
+                # 只有进程不存在时才为None，无权限读取的属性值为None
+                self.logger.warning(f"Process {process.pid} no longer exists")
                 process.state = ProcessState.TERMINATED
+                continue
+            process.cpu_usage = values['cpu_percent'] or 0.0
+            process.memory_usage = values['memory_percent'] or 0.0
                 
     def set_process_priority(self, pid: int, priority: int):
         """设置进程优先级"""
-        if pid in self._processes:
-            self._processes[pid].priority = priority
+        process = self._processes.get(pid)
+        if process is not None:
+            process.priority = priority
             self.logger.info(f"Set process {pid} priority to {priority}")
             
-    def schedule_processes(self):
-        """进程调度"""
-        # 实现简单的优先级调度
-        running_processes = [p for p in self._processes.values() 
-                           if p.state == ProcessState.RUNNING]
+    def schedule_processes(self) -> List[Process]:
+        """
+        进程调度
+        
+        Returns:
+            按优先级排列的运行中进程
+        """
+        # 实现简单的优先级调度，直接从 (状态, 优先级) 索引按优先级读取
+        return list(self._processes.iter_processes(ProcessState.RUNNING, by_priority=True))
         
-        # 按优先级排序
-        running_processes.sort(key=lambda p: p.priority, reverse=True)
+    def simulate_scheduling(
+        self,
+        policies: Optional[Iterable[str]] = None,
+        processes: Optional[List[Process]] = None,
+        count: int = 1000,
+        mean_burst: float = 20.0,
+        load: float = 0.9,
+        seed: Optional[int] = None,
+        context_switch: float = 0.0
+    ) -> List[Dict]:
+        """
+        模拟不同调度算法在同一负载下的表现，用于调整优先级前评估影响
         
-        # TODO: 实现更复杂的调度算法
+        Args:
+            policies: 调度算法 (priority, rr, mlfq, cfs)，None表示全部
+            processes: 参与模拟的进程，默认为当前管理的进程，没有进程时生成count个模拟进程
+            count: 生成的模拟进程数量
+            mean_burst: 平均CPU执行时间
+            load: CPU负载
+            seed: 随机种子
+            context_switch: 上下文切换开销
+            
+        Returns:
+            各调度算法的吞吐量、延迟和公平性指标
+        """
+        if processes is None:
+            processes = list(self._processes.iter_processes())
+        if not processes:
+            processes = [Process(pid, f"sim-{pid}") for pid in range(1, count + 1)]
+            
+        arrivals, bursts = generate_arrivals(len(processes), mean_burst, load, seed)
+        results = []
+        for name in policies or POLICIES:
+            jobs = make_jobs(processes, arrivals, bursts)
+            result = simulate(jobs, create_policy(name), context_switch)
+            self.logger.info(
+                f"Scheduling {name}: avg turnaround {result['avg_turnaround']:.1f}, "
+                f"avg response {result['avg_response']:.1f}, fairness {result['fairness']:.3f}"
+            )
+            results.append(result)
+        return results
         
     def cleanup(self):
         """清理进程管理器"""
-        for pid in list(self._processes.keys()):
+        for pid in self._processes.pids():
             self.terminate_process(pid)
+        self._pid_allocator.reset()
         self.logger.info("Process manager cleaned up")
@@ -0,0 +1,219 @@
+"""
+进程信息刷新模块
+保留psutil进程句柄并批量刷新进程属性，供进程管理器和内核共用
+"""
+import logging
+import threading
+import weakref
+import psutil
+from typing import Any, Dict, Iterable, Optional, Sequence, Set
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_ATTRS = ('name', 'status', 'cpu_percent', 'memory_percent')
+
+# 需要额外读取 /proc 文件或系统调用的属性，批量刷新时放到线程池中并行获取
+EXPENSIVE_ATTRS = frozenset({
+    'memory_full_info', 'open_files', 'connections', 'net_connections', 'num_fds',
+    'io_counters', 'cwd', 'exe', 'cmdline', 'environ', 'threads', 'memory_maps'
+})
+
+class ProcessRefresher:
+    """
+    进程信息刷新器
+
+    进程句柄在两次刷新之间保留，cpu_percent可以基于上次刷新计算；
+    每个进程的属性在oneshot上下文中一次读取，只获取调用方需要的属性；
+    调用方以自身为owner通过acquire/release引用进程，句柄在引用计数归零时释放；
+    owner被回收或调用release_all时其全部引用随之释放
+    """
+    def __init__(self, attrs: Sequence[str] = DEFAULT_ATTRS, max_workers: int = 4):
+        """
+        Args:
+            attrs: 默认刷新的属性
+            max_workers: 获取开销较大的属性时使用的线程数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.attrs = tuple(attrs)
+        self.max_workers = max_workers
+        self._handles: Dict[int, psutil.Process] = {}
+        self._refs: Dict[int, int] = {}  # 进程 -> 引用该进程的调用方数
+        self._owned = weakref.WeakKeyDictionary()  # 调用方 -> (引用的进程集合, 释放回调)
+        # owner被回收时的释放回调可能在持有锁的线程中由GC触发，因此使用可重入锁
+        self._lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def track(self, pid: int) -> Optional[psutil.Process]:
+        """
+        获取或创建进程句柄
+
+        Returns:
+            进程句柄，进程不存在时返回None；无权限读取的进程仍返回句柄
+
+        Raises:
+            psutil.AccessDenied: 无权限创建进程句柄
+        """
+        with self._lock:
+            handle = self._handles.get(pid)
+        if handle is not None:
+            return handle
+        try:
+            handle = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            return None
+        try:
+            # 建立cpu_percent的计算基准
+            handle.cpu_percent(None)
+        except psutil.AccessDenied:
+            # 受限进程仍然存在，无权限读取的属性由as_dict返回None
+            pass
+        except psutil.NoSuchProcess:
+            return None
+        with self._lock:
+            return self._handles.setdefault(pid, handle)
+
+    def forget(self, pid: int):
+        """不再跟踪进程"""
+        with self._lock:
+            self._handles.pop(pid, None)
+
+    def acquire(self, pid: int, owner: Any) -> Optional[psutil.Process]:
+        """
+        以owner的名义引用进程并返回句柄
+
+        Returns:
+            进程句柄，进程不存在时返回None且不增加引用
+
+        Raises:
+            psutil.AccessDenied: 无权限创建进程句柄
+        """
+        handle = self.track(pid)
+        if handle is not None:
+            with self._lock:
+                self._add_ref(pid, owner)
+        return handle
+
+    def release(self, pid: int, owner: Any):
+        """释放owner对进程的引用，没有调用方引用时释放句柄"""
+        with self._lock:
+            entry = self._owned.get(owner)
+            if entry is not None and pid in entry[0]:
+                entry[0].discard(pid)
+                self._drop_ref(pid)
+
+    def release_all(self, owner: Any):
+        """释放owner的全部引用"""
+        with self._lock:
+            entry = self._owned.pop(owner, None)
+        if entry is not None:
+            entry[1]()
+
+    def retain(self, pids: Iterable[int], owner: Any):
+        """
+        将owner引用的进程同步为pids，并释放没有任何调用方引用的句柄
+
+        开销与owner的进程数和已缓存的句柄数成正比，只在批量刷新前调用
+        """
+        wanted = set(pids)
+        with self._lock:
+            owned = self._owned_pids(owner)
+            for pid in owned - wanted:
+                owned.discard(pid)
+                self._drop_ref(pid)
+            for pid in wanted - owned:
+                self._add_ref(pid, owner)
+            for pid in [pid for pid in self._handles if pid not in self._refs]:
+                del self._handles[pid]
+
+    def _owned_pids(self, owner: Any) -> Set[int]:
+        """获取owner引用的进程集合，首次引用时注册owner被回收后的释放回调"""
+        entry = self._owned.get(owner)
+        if entry is None:
+            pids: Set[int] = set()
+            # 回调只持有进程集合，不持有owner本身
+            entry = (pids, weakref.finalize(owner, self._drop_refs, pids))
+            self._owned[owner] = entry
+        return entry[0]
+
+    def _add_ref(self, pid: int, owner: Any):
+        owned = self._owned_pids(owner)
+        if pid not in owned:
+            owned.add(pid)
+            self._refs[pid] = self._refs.get(pid, 0) + 1
+
+    def _drop_ref(self, pid: int):
+        count = self._refs.get(pid, 0) - 1
+        if count > 0:
+            self._refs[pid] = count
+        else:
+            self._refs.pop(pid, None)
+            self._handles.pop(pid, None)
+
+    def _drop_refs(self, pids: Set[int]):
+        """释放一组引用，owner被回收或release_all时调用"""
+        with self._lock:
+            for pid in list(pids):
+                self._drop_ref(pid)
+            pids.clear()
+
+    def refresh(self, pids: Iterable[int],
+                attrs: Optional[Sequence[str]] = None) -> Dict[int, Optional[Dict]]:
+        """
+        批量刷新进程属性
+
+        Args:
+            pids: 进程ID列表
+            attrs: 需要的属性，None表示使用默认属性
+
+        Returns:
+            {进程ID: 属性字典}，只有进程已不存在时为None；无权限读取的属性值为None
+        """
+        attrs = list(attrs or self.attrs)
+        pids = list(pids)
+        if EXPENSIVE_ATTRS.intersection(attrs) and len(pids) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="proc-refresh")
+            results = self._executor.map(lambda pid: self._read(pid, attrs), pids)
+        else:
+            results = (self._read(pid, attrs) for pid in pids)
+        return dict(zip(pids, results))
+
+    def _read(self, pid: int, attrs: list) -> Optional[Dict]:
+        """在oneshot中读取单个进程的属性"""
+        try:
+            handle = self.track(pid)
+        except psutil.AccessDenied:
+            return dict.fromkeys(attrs)
+        if handle is None:
+            return None
+        try:
+            # as_dict内部使用oneshot，同一次读取中共享 /proc/<pid>/stat 等文件的解析结果
+            if not handle.is_running():
+                raise psutil.NoSuchProcess(pid)
+            return handle.as_dict(attrs=attrs, ad_value=None)
+        except psutil.NoSuchProcess:
+            self.forget(pid)
+            return None
+
+    def close(self):
+        """关闭线程池并释放句柄"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        with self._lock:
+            for pids, finalizer in list(self._owned.values()):
+                finalizer.detach()
+            self._owned.clear()
+            self._refs.clear()
+            self._handles.clear()
+
+_shared: Optional[ProcessRefresher] = None
+_shared_lock = threading.Lock()
+
+def get_shared_refresher() -> ProcessRefresher:
+    """获取进程管理器和内核共用的刷新器"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ProcessRefresher()
+        return _shared
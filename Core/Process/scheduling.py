@@ -0,0 +1,305 @@
+"""
+进程调度模拟模块
+以离散事件方式模拟进程调度，比较不同调度算法的吞吐量、延迟和公平性
+"""
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+from collections import deque
+
+import numpy as np
+
+class SimJob:
+    """模拟作业：进程及其到达时间和CPU执行时间"""
+    __slots__ = ('process', 'arrival', 'burst', 'remaining', 'start', 'finish',
+                 'level', 'vruntime', 'weight', 'seq')
+
+    def __init__(self, process, arrival: float, burst: float):
+        self.process = process
+        self.arrival = arrival
+        self.burst = burst
+        self.remaining = burst
+        self.start: Optional[float] = None
+        self.finish: Optional[float] = None
+        self.level = 0  # MLFQ队列级别
+        self.vruntime = 0.0  # CFS虚拟运行时间
+        self.weight = 1024  # CFS权重
+        self.seq = 0
+
+class SchedulingPolicy:
+    """
+    调度算法基类
+
+    quantum返回None表示作业运行到结束(非抢占)
+    """
+    name = ""
+
+    def add(self, job: SimJob, now: float):
+        """作业到达就绪队列"""
+        raise NotImplementedError
+
+    def pick(self, now: float) -> Optional[SimJob]:
+        """选择下一个运行的作业"""
+        raise NotImplementedError
+
+    def quantum(self, job: SimJob) -> Optional[float]:
+        """作业本次可运行的时间片"""
+        return None
+
+    def requeue(self, job: SimJob, ran: float, now: float):
+        """时间片用完后放回就绪队列"""
+        self.add(job, now)
+
+    def on_finish(self, job: SimJob, ran: float, now: float):
+        """作业结束"""
+
+class PriorityPolicy(SchedulingPolicy):
+    """非抢占式优先级调度，优先级相同时先到先服务"""
+    name = "priority"
+
+    def __init__(self):
+        self._heap: list = []
+
+    def add(self, job: SimJob, now: float):
+        heapq.heappush(self._heap, (-job.process.priority, job.arrival, job.seq, job))
+
+    def pick(self, now: float) -> Optional[SimJob]:
+        return heapq.heappop(self._heap)[3] if self._heap else None
+
+class RoundRobinPolicy(SchedulingPolicy):
+    """时间片轮转"""
+    name = "rr"
+
+    def __init__(self, time_slice: float = 10.0):
+        self.time_slice = time_slice
+        self._queue: deque = deque()
+
+    def add(self, job: SimJob, now: float):
+        self._queue.append(job)
+
+    def pick(self, now: float) -> Optional[SimJob]:
+        return self._queue.popleft() if self._queue else None
+
+    def quantum(self, job: SimJob) -> Optional[float]:
+        return self.time_slice
+
+class MLFQPolicy(SchedulingPolicy):
+    """
+    多级反馈队列
+
+    新作业进入最高级队列，用完时间片后降级；每隔boost_interval将所有作业提升回最高级，避免饥饿
+    """
+    name = "mlfq"
+
+    def __init__(self, time_slices: Sequence[float] = (8.0, 16.0, 32.0),
+                 boost_interval: float = 1000.0):
+        self.time_slices = tuple(time_slices)
+        self.boost_interval = boost_interval
+        self._queues: List[deque] = [deque() for _ in self.time_slices]
+        self._next_boost = boost_interval
+
+    def add(self, job: SimJob, now: float):
+        self._queues[job.level].append(job)
+
+    def pick(self, now: float) -> Optional[SimJob]:
+        if now >= self._next_boost:
+            self._boost()
+            self._next_boost = now + self.boost_interval
+        for queue in self._queues:
+            if queue:
+                return queue.popleft()
+        return None
+
+    def _boost(self):
+        top = self._queues[0]
+        for queue in self._queues[1:]:
+            for job in queue:
+                job.level = 0
+            top.extend(queue)
+            queue.clear()
+
+    def quantum(self, job: SimJob) -> Optional[float]:
+        return self.time_slices[job.level]
+
+    def requeue(self, job: SimJob, ran: float, now: float):
+        if ran >= self.time_slices[job.level] and job.level < len(self.time_slices) - 1:
+            job.level += 1
+        self.add(job, now)
+
+class CFSPolicy(SchedulingPolicy):
+    """
+    类CFS的完全公平调度
+
+    就绪作业按虚拟运行时间放入最小堆，每次运行虚拟运行时间最小的作业；
+    时间片按权重分配调度周期，虚拟运行时间按 实际时间*1024/权重 增长；
+    优先级映射为nice值 (nice = -priority)，权重为 1024/1.25^nice
+    """
+    name = "cfs"
+
+    def __init__(self, sched_latency: float = 24.0, min_granularity: float = 3.0):
+        self.sched_latency = sched_latency
+        self.min_granularity = min_granularity
+        self._heap: list = []
+        self._total_weight = 0.0
+        self._min_vruntime = 0.0
+
+    def add(self, job: SimJob, now: float):
+        if job.start is None:
+            nice = min(19, max(-20, -job.process.priority))
+            job.weight = 1024 / (1.25 ** nice)
+            # 新作业从当前最小虚拟运行时间开始，不会因为之前未运行而长期独占CPU
+            job.vruntime = self._min_vruntime
+        self._total_weight += job.weight
+        heapq.heappush(self._heap, (job.vruntime, job.seq, job))
+
+    def pick(self, now: float) -> Optional[SimJob]:
+        if not self._heap:
+            return None
+        job = heapq.heappop(self._heap)[2]
+        self._min_vruntime = max(self._min_vruntime, job.vruntime)
+        return job
+
+    def quantum(self, job: SimJob) -> Optional[float]:
+        total = self._total_weight
+        return max(self.min_granularity, self.sched_latency * job.weight / total)
+
+    def requeue(self, job: SimJob, ran: float, now: float):
+        self._total_weight -= job.weight
+        job.vruntime += ran * 1024 / job.weight
+        self.add(job, now)
+
+    def on_finish(self, job: SimJob, ran: float, now: float):
+        self._total_weight -= job.weight
+
+POLICIES = {policy.name: policy for policy in
+            (PriorityPolicy, RoundRobinPolicy, MLFQPolicy, CFSPolicy)}
+
+def create_policy(name: str, **kwargs) -> SchedulingPolicy:
+    """
+    创建调度算法
+
+    Args:
+        name: 算法名称 (priority, rr, mlfq, cfs)
+        **kwargs: 算法参数
+    """
+    policy = POLICIES.get(name.lower())
+    if policy is None:
+        raise ValueError(f"Unknown scheduling policy: {name}")
+    return policy(**kwargs)
+
+def make_jobs(processes: Iterable, arrivals: Sequence[float],
+              bursts: Sequence[float]) -> List[SimJob]:
+    """为进程创建模拟作业，执行时间必须为正数"""
+    jobs = []
+    for process, arrival, burst in zip(processes, arrivals, bursts):
+        if not burst > 0:
+            raise ValueError(f"burst must be positive, got {burst} for process {process.pid}")
+        jobs.append(SimJob(process, float(arrival), float(burst)))
+    return jobs
+
+def generate_arrivals(count: int, mean_burst: float = 20.0, load: float = 0.9,
+                      seed: Optional[int] = None):
+    """
+    生成泊松到达时间和指数分布的CPU执行时间
+
+    Args:
+        count: 作业数量
+        mean_burst: 平均执行时间
+        load: CPU负载(到达率*平均执行时间)
+        seed: 随机种子
+
+    Returns:
+        (到达时间数组, 执行时间数组)
+    """
+    rng = np.random.default_rng(seed)
+    arrivals = np.cumsum(rng.exponential(mean_burst / load, count))
+    bursts = np.maximum(rng.exponential(mean_burst, count), 0.1)
+    return arrivals, bursts
+
+def simulate(jobs: List[SimJob], policy: SchedulingPolicy, context_switch: float = 0.0) -> Dict:
+    """
+    模拟单CPU上的作业调度
+
+    Args:
+        jobs: 模拟作业，会被原地更新
+        policy: 调度算法
+        context_switch: 每次切换作业的开销
+
+    Returns:
+        调度指标
+    """
+    started = time.perf_counter()
+    pending = sorted(jobs, key=lambda j: j.arrival)
+    for seq, job in enumerate(pending):
+        job.seq = seq
+        job.remaining = job.burst
+        job.start = job.finish = None
+        job.level = 0
+        job.vruntime = 0.0
+
+    count = len(pending)
+    now = 0.0
+    index = finished = switches = 0
+    previous = None
+    add, pick, quantum, requeue = policy.add, policy.pick, policy.quantum, policy.requeue
+    while finished < count:
+        while index < count and pending[index].arrival <= now:
+            add(pending[index], now)
+            index += 1
+        job = pick(now)
+        if job is None:
+            now = pending[index].arrival
+            continue
+
+        if job is not previous:
+            switches += 1
+            now += context_switch
+            previous = job
+        if job.start is None:
+            job.start = now
+        limit = quantum(job)
+        ran = job.remaining if limit is None or limit >= job.remaining else limit
+        now += ran
+        job.remaining -= ran
+        if job.remaining <= 1e-9:
+            job.finish = now
+            finished += 1
+            policy.on_finish(job, ran, now)
+        else:
+            # 时间片内到达的作业排在被抢占作业之前
+            while index < count and pending[index].arrival <= now:
+                add(pending[index], now)
+                index += 1
+            requeue(job, ran, now)
+
+    elapsed = time.perf_counter() - started
+    return _metrics(policy.name, pending, switches, elapsed)
+
+def _metrics(name: str, jobs: List[SimJob], switches: int, elapsed: float) -> Dict:
+    """计算调度指标"""
+    if not jobs:
+        return {'policy': name, 'jobs': 0}
+    arrival = np.fromiter((j.arrival for j in jobs), float, len(jobs))
+    burst = np.fromiter((j.burst for j in jobs), float, len(jobs))
+    start = np.fromiter((j.start for j in jobs), float, len(jobs))
+    finish = np.fromiter((j.finish for j in jobs), float, len(jobs))
+    turnaround = finish - arrival
+    response = start - arrival
+    # 归一化速率: 执行时间/周转时间，Jain公平指数为1表示所有作业受到同等对待
+    rate = burst / turnaround
+    makespan = finish.max() - arrival.min()
+    return {
+        'policy': name,
+        'jobs': len(jobs),
+        'makespan': float(makespan),
+        'throughput': float(len(jobs) / makespan) if makespan else 0.0,
+        'avg_turnaround': float(turnaround.mean()),
+        'avg_waiting': float((turnaround - burst).mean()),
+        'avg_response': float(response.mean()),
+        'p95_response': float(np.percentile(response, 95)),
+        'p99_turnaround': float(np.percentile(turnaround, 99)),
+        'avg_slowdown': float((turnaround / burst).mean()),
+        'fairness': float(rate.sum() ** 2 / (len(rate) * (rate ** 2).sum())),
+        'context_switches': switches,
+        'seconds': elapsed
+    }
@@ -2,13 +2,19 @@
 错误处理模块
 负责系统错误的统一处理和恢复
 """
+import re
+import time
 import logging
+import threading
 import traceback
-from typing import Dict, List, Callable, Optional
+from typing import Dict, List, Callable, Optional, Tuple
+from collections import OrderedDict, deque
 from enum import Enum
 from datetime import datetime
 from pathlib import Path
 
+from .log_writer import AsyncLogWriter
+
 class ErrorLevel(Enum):
     """错误级别"""
     DEBUG = 'debug'
@@ -40,27 +46,198 @@ class SystemError:
         self.message = message
         self.exception = exception
         self.timestamp = datetime.now()
-        self.traceback = traceback.format_exc() if exception else None
+        self.suppressed = 0  # 本条记录之前被合并的重复次数
+        self._traceback: Optional[str] = None
+        self._fingerprint: Optional[Tuple] = None
+
+    @property
+    def traceback(self) -> Optional[str]:
+        """异常堆栈，首次访问时才格式化"""
+        if self._traceback is None and self.exception is not None:
+            self._traceback = ''.join(traceback.format_exception(
+                type(self.exception), self.exception, self.exception.__traceback__
+            ))
+        return self._traceback
+
+    @property
+    def fingerprint(self) -> Tuple:
+        """错误指纹: (错误类型, 异常类型, 消息模板, 抛出位置)"""
+        if self._fingerprint is None:
+            location = None
+            tb = self.exception.__traceback__ if self.exception is not None else None
+            while tb is not None:
+                location = (tb.tb_frame.f_code.co_filename, tb.tb_lineno)
+                tb = tb.tb_next
+            self._fingerprint = (
+                self.error_type,
+                type(self.exception).__name__ if self.exception is not None else None,
+                _message_template(self.message),
+                location
+            )
+        return self._fingerprint
+
+_TEMPLATE_PATTERN = re.compile(r"0x[0-9a-fA-F]+|\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"")
+
+def _message_template(message: str) -> str:
+    """将消息中的数字、地址和引号内容替换为占位符，使同类错误得到相同的模板"""
+    return _TEMPLATE_PATTERN.sub('*', message)
+
+class ErrorStats:
+    """同一指纹错误的统计"""
+    __slots__ = ('count', 'suppressed', 'first_seen', 'last_seen', 'last_logged', 'last_recovery',
+                 'last_level', 'last_message')
+
+    def __init__(self, now: float):
+        self.count = 0
+        self.suppressed = 0  # 自上次记录以来被合并的次数
+        self.first_seen = now
+        self.last_seen = now
+        self.last_logged: Optional[float] = None
+        self.last_recovery: Optional[float] = None
+        self.last_level: Optional[ErrorLevel] = None  # 最近一次被合并的错误，用于汇总记录
+        self.last_message: Optional[str] = None
         
+class ErrorHistory:
+    """
+    有界错误历史
+
+    按时间顺序保存在环形队列中，并为每个错误类型和级别维护各自的队列；
+    最旧的记录同时也是其类型队列和级别队列的队首，淘汰时均为O(1)；
+    另按分钟汇总各类型和级别的出现次数
+    """
+    def __init__(self, max_size: int = 1000, max_minutes: int = 1440):
+        """
+        Args:
+            max_size: 保留的错误数量
+            max_minutes: 保留分钟计数的时长(分钟)
+        """
+        self.max_size = max_size
+        self.max_minutes = max_minutes
+        self._errors: deque = deque()
+        self._by_type: Dict[ErrorType, deque] = {t: deque() for t in ErrorType}
+        self._by_level: Dict[ErrorLevel, deque] = {l: deque() for l in ErrorLevel}
+        self._minute_counts: OrderedDict = OrderedDict()  # 分钟 -> {(类型, 级别): 次数}
+
+    def __len__(self) -> int:
+        return len(self._errors)
+
+    def append(self, error: SystemError) -> None:
+        """添加错误，超出容量时淘汰最旧的记录"""
+        self._errors.append(error)
+        self._by_type[error.error_type].append(error)
+        self._by_level[error.level].append(error)
+        if len(self._errors) > self.max_size:
+            oldest = self._errors.popleft()
+            self._by_type[oldest.error_type].popleft()
+            self._by_level[oldest.level].popleft()
+
+    def count(self, error: SystemError) -> None:
+        """计入分钟计数，包括被去重合并的错误"""
+        minute = error.timestamp.replace(second=0, microsecond=0)
+        counts = self._minute_counts.get(minute)
+        if counts is None:
+            counts = self._minute_counts[minute] = {}
+            while len(self._minute_counts) > self.max_minutes:
+                self._minute_counts.popitem(last=False)
+        key = (error.error_type, error.level)
+        counts[key] = counts.get(key, 0) + 1
+
+    def query(
+        self,
+        error_type: Optional[ErrorType] = None,
+        level: Optional[ErrorLevel] = None,
+        since: Optional[datetime] = None,
+        limit: int = 100
+    ) -> List[SystemError]:
+        """
+        查询最近的错误
+
+        从较短的索引队列尾部向前遍历，取满limit条或早于since时停止
+
+        Returns:
+            按时间升序排列的错误列表
+        """
+        source = self._errors
+        if error_type is not None:
+            source = self._by_type[error_type]
+        if level is not None and len(self._by_level[level]) < len(source):
+            source = self._by_level[level]
+
+        result = []
+        for error in reversed(source):
+            if len(result) >= limit or (since is not None and error.timestamp < since):
+                break
+            if (error_type is None or error.error_type == error_type) and \
+                    (level is None or error.level == level):
+                result.append(error)
+        result.reverse()
+        return result
+
+    def get_counts(self, minutes: int = 60) -> List[Dict]:
+        """
+        获取最近若干分钟的错误计数
+
+        Returns:
+            按时间升序排列的每分钟计数，包含按类型、按级别的计数和总数
+        """
+        items = list(self._minute_counts.items())[-minutes:]
+        result = []
+        for minute, counts in items:
+            by_type: Dict[str, int] = {}
+            by_level: Dict[str, int] = {}
+            for (error_type, level), n in counts.items():
+                by_type[error_type.value] = by_type.get(error_type.value, 0) + n
+                by_level[level.value] = by_level.get(level.value, 0) + n
+            result.append({
+                "time": minute,
+                "by_type": by_type,
+                "by_level": by_level,
+                "total": sum(counts.values())
+            })
+        return result
+
+    def clear(self) -> None:
+        """清空历史和计数"""
+        self._errors.clear()
+        for index in (*self._by_type.values(), *self._by_level.values()):
+            index.clear()
+        self._minute_counts.clear()
+
 class ErrorHandler:
     """错误处理器"""
     _instance = None
     
-    def __new__(cls):
+    def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super(ErrorHandler, cls).__new__(cls)
             cls._instance._initialized = False
         return cls._instance
     
-    def __init__(self):
+    def __init__(self, dedup_window: float = 60.0, recovery_interval: float = 10.0,
+                 max_fingerprints: int = 10000):
+        """
+        Args:
+            dedup_window: 同一指纹的错误在该时间(秒)内只记录一次
+            recovery_interval: 同一指纹的错误两次恢复尝试的最小间隔(秒)
+            max_fingerprints: 保留统计的最大指纹数
+        """
         if not self._initialized:
             self.logger = logging.getLogger(__name__)
             self._error_handlers: Dict[ErrorType, List[Callable]] = {}
             self._recovery_handlers: Dict[ErrorType, List[Callable]] = {}
-            self._error_history: List[SystemError] = []
             self._max_history = 1000
+            self._error_history = ErrorHistory(self._max_history)
             self._log_path = Path("logs")
             self._ensure_log_path()
+            self._dedup_window = dedup_window
+            self._recovery_interval = recovery_interval
+            self._max_fingerprints = max_fingerprints
+            self._error_stats: OrderedDict = OrderedDict()  # 指纹 -> ErrorStats，按最近出现排序
+            self._suppressed_keys: set = set()  # 有未记录合并次数的指纹
+            self._lock = threading.Lock()
+            # 重复错误停止后，由写入线程按刷新间隔补写合并次数的汇总
+            self._log_writer = AsyncLogWriter(self._log_path,
+                                              on_interval=self._pending_summaries)
             self._initialized = True
             
     def _ensure_log_path(self):
@@ -117,14 +294,11 @@ class ErrorHandler:
         """
         # 创建错误对象
         error = SystemError(error_type, level, message, exception)
+        should_log, should_recover = self._track(error)
         
-        # 记录错误历史
-        self._error_history.append(error)
-        if len(self._error_history) > self._max_history:
-            self._error_history = self._error_history[-self._max_history:]
-            
-        # 记录日志
-        self._log_error(error)
+        if should_log:
+            # 记录日志
+            self._log_error(error)
         
         # 调用错误处理器
         if error_type in self._error_handlers:
@@ -135,7 +309,53 @@ class ErrorHandler:
                     self.logger.error(f"Error in error handler: {str(e)}")
                     
         # 尝试恢复
-        self._try_recovery(error)
+        if should_recover:
+            self._try_recovery(error)
+            
+    def _track(self, error: SystemError) -> Tuple[bool, bool]:
+        """
+        更新错误指纹统计
+        
+        Args:
+            error: 错误对象
+            
+        Returns:
+            (是否记录日志和历史, 是否尝试恢复)
+        """
+        now = time.monotonic()
+        fingerprint = error.fingerprint
+        with self._lock:
+            stats = self._error_stats.get(fingerprint)
+            if stats is None:
+                stats = ErrorStats(now)
+                self._error_stats[fingerprint] = stats
+                if len(self._error_stats) > self._max_fingerprints:
+                    evicted, _ = self._error_stats.popitem(last=False)
+                    self._suppressed_keys.discard(evicted)
+            else:
+                self._error_stats.move_to_end(fingerprint)
+            stats.count += 1
+            stats.last_seen = now
+            self._error_history.count(error)
+            
+            should_log = stats.last_logged is None or now - stats.last_logged >= self._dedup_window
+            if should_log:
+                error.suppressed = stats.suppressed
+                stats.suppressed = 0
+                stats.last_logged = now
+                self._suppressed_keys.discard(fingerprint)
+                self._error_history.append(error)
+            else:
+                stats.suppressed += 1
+                stats.last_level = error.level
+                stats.last_message = error.message
+                self._suppressed_keys.add(fingerprint)
+                
+            should_recover = stats.last_recovery is None or \
+                now - stats.last_recovery >= self._recovery_interval
+            if should_recover and error.error_type in self._recovery_handlers:
+                stats.last_recovery = now
+        return should_log, should_recover
         
     def _log_error(self, error: SystemError) -> None:
         """
@@ -144,17 +364,42 @@ class ErrorHandler:
         Args:
             error: 错误对象
         """
-        log_file = self._log_path / f"{error.timestamp.strftime('%Y%m%d')}.log"
+        text = f"[{error.timestamp}] {error.level.value.upper()}: {error.message}\n"
+        if error.suppressed:
+            text += f"(suppressed {error.suppressed:,} duplicates)\n"
+        if error.traceback:
+            text += f"Traceback:\n{error.traceback}\n"
+        text += "-" * 80 + "\n"
+        # 由后台线程写入文件，队列满时记录被丢弃并汇总提示
+        self._log_writer.write(error.timestamp, text)
         
-        try:
-            with log_file.open('a', encoding='utf-8') as f:
-                f.write(f"[{error.timestamp}] {error.level.value.upper()}: {error.message}\n")
-                if error.traceback:
-                    f.write(f"Traceback:\n{error.traceback}\n")
-                f.write("-" * 80 + "\n")
-                
-        except Exception as e:
-            self.logger.error(f"Error writing to log file: {str(e)}")
+    def _pending_summaries(self, force: bool = False) -> List[Tuple[datetime, str]]:
+        """
+        生成去重窗口已过期的合并次数汇总，由日志写入线程调用
+        
+        Args:
+            force: 是否忽略去重窗口，输出所有未记录的合并次数
+            
+        Returns:
+            需要写入的 (时间, 文本) 记录
+        """
+        now = time.monotonic()
+        timestamp = datetime.now()
+        records = []
+        with self._lock:
+            for fingerprint in list(self._suppressed_keys):
+                stats = self._error_stats.get(fingerprint)
+                if stats is None or not stats.suppressed:
+                    self._suppressed_keys.discard(fingerprint)
+                    continue
+                if not force and now - stats.last_logged < self._dedup_window:
+                    continue
+                records.append((timestamp,
+                                f"[{timestamp}] {stats.last_level.value.upper()}: {stats.last_message}\n"
+                                f"(suppressed {stats.suppressed:,} duplicates)\n" + "-" * 80 + "\n"))
+                stats.suppressed = 0
+                self._suppressed_keys.discard(fingerprint)
+        return records
             
     def _try_recovery(self, error: SystemError) -> bool:
         """
@@ -183,7 +428,8 @@ class ErrorHandler:
         self,
         error_type: Optional[ErrorType] = None,
         level: Optional[ErrorLevel] = None,
-        limit: int = 100
+        limit: int = 100,
+        since: Optional[datetime] = None
     ) -> List[SystemError]:
         """
         获取错误历史
@@ -192,20 +438,64 @@ class ErrorHandler:
             error_type: 错误类型过滤
             level: 错误级别过滤
             limit: 返回数量限制
+            since: 只返回该时间之后的错误
             
         Returns:
             错误历史列表
         """
-        filtered = self._error_history
+        with self._lock:
+            return self._error_history.query(error_type, level, since, limit)
+            
+    def get_error_counts(self, minutes: int = 60) -> List[Dict]:
+        """
+        获取每分钟的错误计数，包含被去重合并的错误
         
-        if error_type:
-            filtered = [e for e in filtered if e.error_type == error_type]
-        if level:
-            filtered = [e for e in filtered if e.level == level]
+        Args:
+            minutes: 返回最近的分钟数
             
-        return filtered[-limit:]
+        Returns:
+            每分钟按类型和级别汇总的计数
+        """
+        with self._lock:
+            return self._error_history.get_counts(minutes)
+        
+    def get_error_stats(self, limit: int = 20) -> List[Dict]:
+        """
+        获取重复错误统计
+        
+        Args:
+            limit: 返回数量限制
+            
+        Returns:
+            按出现次数降序排列的错误指纹统计
+        """
+        with self._lock:
+            items = list(self._error_stats.items())
+        now = time.monotonic()
+        stats = [
+            {
+                "error_type": fingerprint[0].value,
+                "exception": fingerprint[1],
+                "template": fingerprint[2],
+                "location": f"{fingerprint[3][0]}:{fingerprint[3][1]}" if fingerprint[3] else None,
+                "count": record.count,
+                "suppressed": record.suppressed,
+                "first_seen_ago": now - record.first_seen,
+                "last_seen_ago": now - record.last_seen
+            }
+            for fingerprint, record in items
+        ]
+        stats.sort(key=lambda x: x["count"], reverse=True)
+        return stats[:limit]
+        
+    def flush_logs(self) -> None:
+        """等待已提交的错误日志写入文件"""
+        self._log_writer.flush()
         
     def clear_history(self) -> None:
         """清理错误历史"""
-        self._error_history.clear()
+        with self._lock:
+            self._error_history.clear()
+            self._error_stats.clear()
+            self._suppressed_keys.clear()
         self.logger.info("Error history cleared")
@@ -0,0 +1,168 @@
+"""
+日志写入模块
+在后台线程中批量写入日志文件，避免调用线程直接进行文件操作
+"""
+import time
+import atexit
+import logging
+import threading
+from typing import Callable, Iterable, Optional, TextIO, Tuple
+from datetime import datetime
+from pathlib import Path
+from queue import Queue, Full, Empty
+
+class AsyncLogWriter:
+    """
+    异步日志写入器
+
+    日志记录放入有界队列，由后台线程写入按天轮转的日志文件；
+    文件句柄保持打开，按缓冲大小或时间间隔刷新；队列满时丢弃记录并在之后汇总提示；
+    on_interval回调每个刷新间隔在写入线程中调用一次，flush和close时以force=True调用，
+    返回的记录直接写入文件，供调用方补写延迟产生的汇总记录
+    """
+    def __init__(self, log_path: Path, max_queue: int = 10000,
+                 flush_size: int = 64 * 1024, flush_interval: float = 1.0,
+                 on_interval: Optional[Callable[[bool], Iterable[Tuple[datetime, str]]]] = None):
+        """
+        Args:
+            log_path: 日志目录
+            max_queue: 队列容量
+            flush_size: 缓冲达到该字节数时刷新
+            flush_interval: 最长刷新间隔(秒)
+            on_interval: 周期回调，参数为是否强制，返回需要写入的 (时间, 文本) 记录
+        """
+        self.logger = logging.getLogger(__name__)
+        self._log_path = log_path
+        self._queue: Queue = Queue(maxsize=max_queue)
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._file: Optional[TextIO] = None
+        self._file_date: Optional[str] = None
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+        self._on_interval = on_interval
+        self._last_interval = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, timestamp: datetime, text: str) -> bool:
+        """
+        提交一条日志记录，不阻塞调用线程
+
+        Returns:
+            是否已放入队列，队列满时返回False
+        """
+        try:
+            self._queue.put_nowait((timestamp, text))
+            return True
+        except Full:
+            with self._dropped_lock:
+                self._dropped += 1
+            return False
+
+    @property
+    def dropped(self) -> int:
+        """累计丢弃的记录数"""
+        return self._dropped
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """等待队列中的记录写入并刷新到文件"""
+        done = threading.Event()
+        try:
+            self._queue.put((None, done), timeout=timeout)
+        except Full:
+            return
+        done.wait(timeout)
+
+    def close(self) -> None:
+        """写完剩余记录并关闭文件"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put((None, None))
+        self._thread.join()
+
+    def _run(self):
+        """后台写入循环"""
+        while True:
+            try:
+                timestamp, text = self._queue.get(timeout=self._flush_interval)
+            except Empty:
+                self._run_interval()
+                self._flush_file()
+                continue
+
+            if timestamp is None:
+                self._write_dropped_summary()
+                self._run_interval(force=True)
+                self._flush_file()
+                if text is None:
+                    self._close_file()
+                    return
+                text.set()
+                continue
+
+            self._write_dropped_summary()
+            self._write_record(timestamp, text)
+            if time.monotonic() - self._last_interval >= self._flush_interval:
+                self._run_interval()
+            if self._pending_bytes >= self._flush_size or \
+                    time.monotonic() - self._last_flush >= self._flush_interval:
+                self._flush_file()
+
+    def _run_interval(self, force: bool = False):
+        """调用周期回调并写入其返回的记录"""
+        self._last_interval = time.monotonic()
+        if self._on_interval is None:
+            return
+        try:
+            for timestamp, text in self._on_interval(force):
+                self._write_record(timestamp, text)
+        except Exception as e:
+            self.logger.error(f"Error in log interval callback: {str(e)}")
+
+    def _write_record(self, timestamp: datetime, text: str):
+        """写入一条记录，日期变化时切换日志文件"""
+        date = timestamp.strftime('%Y%m%d')
+        try:
+            if date != self._file_date:
+                self._close_file()
+                self._log_path.mkdir(parents=True, exist_ok=True)
+                self._file = (self._log_path / f"{date}.log").open('a', encoding='utf-8')
+                self._file_date = date
+            self._file.write(text)
+            self._pending_bytes += len(text)
+        except Exception as e:
+            self.logger.error(f"Error writing to log file: {str(e)}")
+
+    def _write_dropped_summary(self):
+        """汇总提示因队列满而丢弃的记录"""
+        if not self._dropped:
+            return
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        now = datetime.now()
+        self._write_record(now, f"[{now}] WARNING: log queue full, dropped {dropped} records\n"
+                                + "-" * 80 + "\n")
+
+    def _flush_file(self):
+        """刷新文件缓冲"""
+        if self._file and self._pending_bytes:
+            try:
+                self._file.flush()
+            except Exception as e:
+                self.logger.error(f"Error flushing log file: {str(e)}")
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+
+    def _close_file(self):
+        """关闭当前日志文件"""
+        if self._file:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+            self._file_date = None
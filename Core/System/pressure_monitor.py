@@ -0,0 +1,202 @@
+"""
+资源压力监控模块
+读取Linux PSI (/proc/pressure) 的停顿时间统计，并通过PSI触发器实时通知压力事件
+"""
+import os
+import time
+import select
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+RESOURCES = ('cpu', 'memory', 'io')
+
+class PressureTrigger:
+    """压力触发器：window时间窗口内停顿时间超过stall时回调"""
+    def __init__(self, resource: str, kind: str, stall_us: int, window_us: int,
+                 callback: Callable[[str, Dict], None]):
+        self.resource = resource
+        self.kind = kind
+        self.stall_us = stall_us
+        self.window_us = window_us
+        self.callback = callback
+        self.fd: Optional[int] = None  # 内核触发器文件描述符，None表示轮询模式
+        self.last_total: Optional[int] = None
+        self.last_time = 0.0
+
+class PressureMonitor:
+    """
+    PSI压力监控器
+
+    优先向 /proc/pressure/<resource> 注册内核触发器，由poll等待事件；
+    内核不支持或权限不足时按poll_interval轮询total计算停顿比例
+    """
+    def __init__(self, pressure_root: str = "/proc/pressure", poll_interval: float = 0.5):
+        """
+        Args:
+            pressure_root: PSI文件目录
+            poll_interval: 轮询模式的检查间隔(秒)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.pressure_root = pressure_root
+        self.poll_interval = poll_interval
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._triggers: List[PressureTrigger] = []
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """系统是否支持PSI"""
+        return os.path.exists(os.path.join(self.pressure_root, "memory"))
+
+    def read_pressure(self, resource: str) -> Optional[Dict]:
+        """
+        读取资源压力
+
+        Args:
+            resource: 资源类型 (cpu, memory, io)
+
+        Returns:
+            {'some': {...}, 'full': {...}}，包含avg10/avg60/avg300(%)和total(微秒)，不支持时返回None
+        """
+        try:
+            with open(os.path.join(self.pressure_root, resource)) as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+
+        pressure = {}
+        for line in lines:
+            kind, *fields = line.split()
+            values = {}
+            for field in fields:
+                key, _, value = field.partition('=')
+                values[key] = int(value) if key == 'total' else float(value)
+            pressure[kind] = values
+        return pressure
+
+    def read_all(self) -> Dict[str, Dict]:
+        """读取所有资源的压力"""
+        result = {}
+        for resource in RESOURCES:
+            pressure = self.read_pressure(resource)
+            if pressure is not None:
+                result[resource] = pressure
+        return result
+
+    def add_trigger(self, resource: str, callback: Callable[[str, Dict], None],
+                    stall_ms: int = 150, window_ms: int = 1000, kind: str = 'some') -> bool:
+        """
+        添加压力触发器
+
+        Args:
+            resource: 资源类型 (cpu, memory, io)
+            callback: 回调函数，参数为资源类型和当前压力
+            stall_ms: 时间窗口内的停顿阈值(毫秒)，必须小于时间窗口
+            window_ms: 时间窗口(毫秒)，内核要求在500ms到10s之间
+            kind: some表示至少一个任务停顿，full表示所有任务停顿
+
+        Returns:
+            是否注册了内核触发器，False表示使用轮询
+
+        Raises:
+            ValueError: 资源类型未知或停顿阈值不在 (0, window_ms) 内
+        """
+        if resource not in RESOURCES:
+            raise ValueError(f"Unknown pressure resource: {resource}")
+        if not 0 < stall_ms < window_ms:
+            # 超过窗口的阈值会被内核以EINVAL拒绝，轮询模式下也永远不会触发
+            raise ValueError(f"stall_ms must be between 0 and window_ms ({window_ms}), got {stall_ms}")
+        trigger = PressureTrigger(resource, kind, stall_ms * 1000, window_ms * 1000, callback)
+        path = os.path.join(self.pressure_root, resource)
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            try:
+                os.write(fd, f"{kind} {trigger.stall_us} {trigger.window_us}\0".encode())
+            except OSError:
+                os.close(fd)
+                raise
+            trigger.fd = fd
+        except OSError as e:
+            self.logger.info(f"PSI trigger for {resource} unavailable, polling instead: {str(e)}")
+
+        with self._lock:
+            self._triggers.append(trigger)
+        return trigger.fd is not None
+
+    def start(self):
+        """启动监控线程"""
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="psi-monitor", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """停止监控并关闭触发器"""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        with self._lock:
+            for trigger in self._triggers:
+                if trigger.fd is not None:
+                    try:
+                        os.close(trigger.fd)
+                    except OSError:
+                        pass
+            self._triggers.clear()
+
+    def _run(self):
+        """等待触发器事件并轮询不支持触发器的资源"""
+        while self.running:
+            with self._lock:
+                triggers = list(self._triggers)
+            by_fd = {t.fd: t for t in triggers if t.fd is not None}
+            polled = [t for t in triggers if t.fd is None]
+
+            poller = select.poll()
+            for fd in by_fd:
+                poller.register(fd, select.POLLPRI)
+            try:
+                events = poller.poll(self.poll_interval * 1000)
+            except InterruptedError:
+                continue
+
+            for fd, mask in events:
+                trigger = by_fd[fd]
+                if mask & select.POLLERR:
+                    # 监控对象已不存在(如cgroup被删除)
+                    self.logger.warning(f"PSI trigger for {trigger.resource} closed")
+                    with self._lock:
+                        if trigger in self._triggers:
+                            self._triggers.remove(trigger)
+                    os.close(fd)
+                    continue
+                if mask & select.POLLPRI:
+                    self._fire(trigger)
+
+            for trigger in polled:
+                if self._poll_exceeded(trigger):
+                    self._fire(trigger)
+
+    def _poll_exceeded(self, trigger: PressureTrigger) -> bool:
+        """轮询模式：按total增量估算停顿比例是否超过阈值"""
+        pressure = self.read_pressure(trigger.resource)
+        if not pressure or trigger.kind not in pressure:
+            return False
+        now = time.monotonic()
+        total = pressure[trigger.kind]['total']
+        last_total, last_time = trigger.last_total, trigger.last_time
+        trigger.last_total, trigger.last_time = total, now
+        if last_total is None or now <= last_time:
+            return False
+        stalled = (total - last_total) / ((now - last_time) * 1e6)
+        return stalled >= trigger.stall_us / trigger.window_us
+
+    def _fire(self, trigger: PressureTrigger):
+        """调用触发器回调"""
+        try:
+            trigger.callback(trigger.resource, self.read_pressure(trigger.resource) or {})
+        except Exception as e:
+            self.logger.error(f"Error in pressure callback: {str(e)}")
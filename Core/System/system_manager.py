@@ -160,4 +160,5 @@ class SystemManager:
         self.event_bus.clear()
         self.data_store.cleanup()
         self.error_handler.clear_history()
+        self.error_handler.flush_logs()
         self.logger.info("System manager cleaned up")
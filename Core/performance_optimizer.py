@@ -8,11 +8,16 @@ import logging
 from typing import List, Dict
 from pathlib import Path
 
+from .FileSystem.file_scanner import FileScanner
+from .Process.affinity_optimizer import AffinityOptimizer
+
 class PerformanceOptimizer:
     """性能优化器"""
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.system = psutil
+        self.scanner = FileScanner()
+        self.affinity = AffinityOptimizer()
         
     def analyze_performance(self) -> Dict:
         """分析系统性能"""
@@ -160,19 +165,11 @@ class PerformanceOptimizer:
             '/tmp'
         ]
         
-        for temp_dir in temp_dirs:
-            if temp_dir and os.path.exists(temp_dir):
+        # TEMP和TMP常指向同一目录，去重避免重复扫描
+        for temp_dir in dict.fromkeys(d for d in temp_dirs if d):
+            if os.path.isdir(temp_dir):
                 try:
-                    for root, dirs, files in os.walk(temp_dir):
-                        for file in files:
-                            try:
-                                file_path = os.path.join(root, file)
-                                if os.path.exists(file_path):
-                                    size = os.path.getsize(file_path)
-                                    os.remove(file_path)
-                                    total_cleaned += size
-                            except Exception:
-                                continue
+                    total_cleaned += self.scanner.delete_files(temp_dir)
                 except Exception as e:
                     self.logger.error(f"清理临时文件失败: {str(e)}")
                     
@@ -199,6 +196,25 @@ class PerformanceOptimizer:
             
         return optimized
         
+    def optimize_affinity(self, dry_run: bool = True) -> List[str]:
+        """
+        根据核心负载和NUMA拓扑调整CPU密集型进程的亲和性
+        
+        Args:
+            dry_run: 为True时只给出建议不修改
+            
+        Returns:
+            调整(或建议)说明
+        """
+        try:
+            applied = self.affinity.optimize(dry_run=dry_run)
+        except Exception as e:
+            self.logger.error(f"CPU亲和性优化失败: {str(e)}")
+            return []
+        prefix = "建议将" if dry_run else "已将"
+        return [f"{prefix} {item['name']} ({item['pid']}) 绑定到CPU {item['affinity']}"
+                for item in applied]
+        
     def _optimize_memory(self) -> int:
         """优化内存使用"""
         freed_memory = 0
@@ -0,0 +1,195 @@
+"""
+任务依赖图模块
+按依赖关系并行执行一组任务，并报告关键路径
+"""
+import time
+import logging
+from typing import Dict, List, Callable, Optional, Any
+from concurrent.futures import Executor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class TaskNode:
+    """任务图节点"""
+    def __init__(self, name: str, func: Callable, depends_on: List[str],
+                 pass_results: bool = False):
+        self.name = name
+        self.func = func
+        self.depends_on = depends_on
+        self.pass_results = pass_results  # 是否把上游结果字典作为参数传入
+
+class TaskGraph:
+    """
+    任务依赖图(DAG)
+
+    节点声明依赖后，就绪节点在线程池中并行执行，上游结果可传给下游
+    """
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.nodes: Dict[str, TaskNode] = {}
+
+    def add_node(self, name: str, func: Callable, depends_on: Optional[List[str]] = None,
+                 pass_results: bool = False) -> bool:
+        """
+        添加节点
+
+        Args:
+            name: 节点名称
+            func: 任务函数
+            depends_on: 依赖的节点名称列表
+            pass_results: 为True时以 {依赖名: 结果} 字典调用任务函数
+
+        Returns:
+            是否添加成功
+        """
+        if name in self.nodes:
+            self.logger.error(f"任务图 {self.name} 中已存在节点: {name}")
+            return False
+        self.nodes[name] = TaskNode(name, func, list(depends_on or []), pass_results)
+        return True
+
+    def topological_order(self) -> Optional[List[str]]:
+        """返回拓扑序，存在未知依赖或环时返回None"""
+        indegree = {name: 0 for name in self.nodes}
+        for node in self.nodes.values():
+            for dep in node.depends_on:
+                if dep not in self.nodes:
+                    self.logger.error(f"节点 {node.name} 依赖未知节点: {dep}")
+                    return None
+                indegree[node.name] += 1
+
+        dependents = self._dependents()
+        ready = [name for name, degree in indegree.items() if degree == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for child in dependents[name]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(self.nodes):
+            self.logger.error(f"任务图 {self.name} 存在循环依赖")
+            return None
+        return order
+
+    def run(self, executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """
+        执行任务图
+
+        Args:
+            executor: 线程池，未提供时临时创建
+
+        Returns:
+            执行报告，包含各节点结果、状态、耗时和关键路径
+        """
+        order = self.topological_order()
+        if order is None:
+            return {}
+
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=min(8, len(self.nodes) or 1)) as pool:
+                return self._execute(pool, order)
+        return self._execute(executor, order)
+
+    def _execute(self, executor: Executor, order: List[str]) -> Dict[str, Any]:
+        """按依赖关系调度节点"""
+        dependents = self._dependents()
+        remaining = {name: len(self.nodes[name].depends_on) for name in order}
+        results: Dict[str, Any] = {}
+        status: Dict[str, str] = {}
+        durations: Dict[str, float] = {}
+        running = {}
+
+        started = time.monotonic()
+        ready = [name for name in order if remaining[name] == 0]
+
+        while ready or running:
+            for name in ready:
+                running[executor.submit(self._run_node, self.nodes[name], results)] = name
+            ready = []
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                ok, value, duration = future.result()
+                durations[name] = duration
+                if ok:
+                    results[name] = value
+                    status[name] = "success"
+                else:
+                    status[name] = "failed"
+                    self.logger.error(f"任务图节点执行失败 {name}: {value}")
+                    self._skip_downstream(name, dependents, status)
+
+                for child in dependents[name]:
+                    remaining[child] -= 1
+                    if remaining[child] == 0 and child not in status:
+                        ready.append(child)
+
+        critical_path, critical_time = self._critical_path(order, durations, status)
+        return {
+            "graph": self.name,
+            "results": results,
+            "status": status,
+            "durations": durations,
+            "total_time": time.monotonic() - started,
+            "critical_path": critical_path,
+            "critical_path_time": critical_time
+        }
+
+    def _run_node(self, node: TaskNode, results: Dict[str, Any]):
+        """执行单个节点，返回 (是否成功, 结果或错误信息, 耗时)"""
+        started = time.monotonic()
+        try:
+            if node.pass_results:
+                value = node.func({dep: results[dep] for dep in node.depends_on})
+            else:
+                value = node.func()
+            return True, value, time.monotonic() - started
+        except Exception as e:
+            return False, str(e), time.monotonic() - started
+
+    def _skip_downstream(self, name: str, dependents: Dict[str, List[str]],
+                         status: Dict[str, str]):
+        """上游失败时跳过所有下游节点"""
+        stack = list(dependents[name])
+        while stack:
+            child = stack.pop()
+            if child not in status:
+                status[child] = "skipped"
+                stack.extend(dependents[child])
+
+    def _critical_path(self, order: List[str], durations: Dict[str, float],
+                       status: Dict[str, str]):
+        """按实际耗时计算关键路径"""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in order:
+            if status.get(name) == "skipped":
+                continue
+            node = self.nodes[name]
+            deps = [dep for dep in node.depends_on if dep in finish]
+            slowest = max(deps, key=lambda dep: finish[dep]) if deps else None
+            previous[name] = slowest
+            finish[name] = (finish[slowest] if slowest else 0.0) + durations.get(name, 0.0)
+
+        if not finish:
+            return [], 0.0
+
+        name = max(finish, key=finish.get)
+        total = finish[name]
+        path = []
+        while name:
+            path.append(name)
+            name = previous[name]
+        return path[::-1], total
+
+    def _dependents(self) -> Dict[str, List[str]]:
+        """构建反向依赖表"""
+        dependents: Dict[str, List[str]] = {name: [] for name in self.nodes}
+        for node in self.nodes.values():
+            for dep in node.depends_on:
+                if dep in dependents:
+                    dependents[dep].append(node.name)
+        return dependents
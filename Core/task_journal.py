@@ -0,0 +1,170 @@
+"""
+任务日志模块
+持久化任务调度状态，支持重启后的错过任务补跑
+"""
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from pathlib import Path
+from enum import Enum
+
+class CatchUpPolicy(Enum):
+    """错过任务的补跑策略"""
+    ONCE = 'once'  # 无论错过几次只补跑一次
+    ALL = 'all'  # 补跑所有错过的次数
+    SKIP = 'skip'  # 不补跑
+
+class TaskJournal:
+    """
+    任务日志
+
+    使用SQLite记录任务的调度配置、上次/下次运行时间和执行结果
+    """
+    def __init__(self, db_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self._db_path = Path(db_path) if db_path else Path("data") / "task_journal.db"
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+        self._init_db()
+        self._records = self._load_records()
+
+    def _init_db(self):
+        """初始化数据表"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    name TEXT PRIMARY KEY,
+                    schedule_type TEXT NOT NULL,
+                    schedule_time TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    enabled INTEGER NOT NULL DEFAULT 1,
+                    last_run TEXT,
+                    next_run TEXT,
+                    last_status TEXT,
+                    last_error TEXT,
+                    last_duration REAL
+                )
+            """)
+            self._conn.commit()
+
+    def _load_records(self) -> Dict[str, Dict]:
+        """一次性加载全部任务记录"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT name, schedule_type, schedule_time, priority, enabled, "
+                "last_run, next_run, last_status, last_error, last_duration FROM tasks"
+            )
+            rows = cursor.fetchall()
+
+        records = {}
+        for row in rows:
+            records[row[0]] = {
+                "name": row[0],
+                "schedule_type": row[1],
+                "schedule_time": row[2],
+                "priority": row[3],
+                "enabled": bool(row[4]),
+                "last_run": datetime.fromisoformat(row[5]) if row[5] else None,
+                "next_run": datetime.fromisoformat(row[6]) if row[6] else None,
+                "last_status": row[7],
+                "last_error": row[8],
+                "last_duration": row[9]
+            }
+        self.logger.info(f"Loaded {len(records)} task records from {self._db_path}")
+        return records
+
+    def get_record(self, name: str) -> Optional[Dict]:
+        """获取任务记录"""
+        return self._records.get(name)
+
+    def get_records(self) -> List[Dict]:
+        """获取所有任务记录"""
+        return list(self._records.values())
+
+    def save_task(self, name: str, schedule_type: str, schedule_time: str,
+                  priority: int, enabled: bool, next_run: Optional[datetime]) -> None:
+        """保存任务调度配置，保留已有的运行记录"""
+        record = self._records.setdefault(name, {
+            "name": name,
+            "last_run": None,
+            "last_status": None,
+            "last_error": None,
+            "last_duration": None
+        })
+        record.update({
+            "schedule_type": schedule_type,
+            "schedule_time": schedule_time,
+            "priority": priority,
+            "enabled": enabled,
+            "next_run": next_run
+        })
+        self._execute(
+            "INSERT INTO tasks (name, schedule_type, schedule_time, priority, enabled, next_run) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET schedule_type=excluded.schedule_type, "
+            "schedule_time=excluded.schedule_time, priority=excluded.priority, "
+            "enabled=excluded.enabled, next_run=excluded.next_run",
+            [(name, schedule_type, schedule_time, priority, int(enabled), self._format(next_run))]
+        )
+
+    def set_enabled(self, name: str, enabled: bool) -> None:
+        """更新任务启用状态"""
+        if name in self._records:
+            self._records[name]["enabled"] = enabled
+            self._execute("UPDATE tasks SET enabled=? WHERE name=?", [(int(enabled), name)])
+
+    def record_run(self, name: str, started: datetime, status: str,
+                   duration: float, error: Optional[str] = None) -> None:
+        """记录一次任务执行结果"""
+        record = self._records.get(name)
+        if record is None:
+            return
+        record.update({
+            "last_run": started,
+            "last_status": status,
+            "last_error": error,
+            "last_duration": duration
+        })
+        self._execute(
+            "UPDATE tasks SET last_run=?, last_status=?, last_error=?, last_duration=? WHERE name=?",
+            [(self._format(started), status, error, duration, name)]
+        )
+
+    def update_next_runs(self, next_runs: List[Tuple[str, Optional[datetime]]]) -> None:
+        """批量更新下次运行时间"""
+        rows = []
+        for name, next_run in next_runs:
+            if name in self._records:
+                self._records[name]["next_run"] = next_run
+                rows.append((self._format(next_run), name))
+        if rows:
+            self._execute("UPDATE tasks SET next_run=? WHERE name=?", rows)
+
+    def remove_task(self, name: str) -> None:
+        """删除任务记录"""
+        if self._records.pop(name, None) is not None:
+            self._execute("DELETE FROM tasks WHERE name=?", [(name,)])
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, rows: List[Tuple]) -> None:
+        """执行写操作"""
+        try:
+            with self._lock:
+                self._conn.executemany(sql, rows)
+                self._conn.commit()
+        except Exception as e:
+            self.logger.error(f"Error writing task journal: {str(e)}")
+
+    @staticmethod
+    def _format(value: Optional[datetime]) -> Optional[str]:
+        """格式化时间"""
+        return value.isoformat() if value else None
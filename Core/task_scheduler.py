@@ -6,9 +6,14 @@ import time
 import logging
 import threading
 import schedule
-from typing import Dict, List, Callable
+import psutil
+from typing import Dict, List, Callable, Optional, Any
 from datetime import datetime, timedelta
 from queue import PriorityQueue
+from concurrent.futures import ThreadPoolExecutor
+
+from .task_journal import TaskJournal, CatchUpPolicy
+from .task_graph import TaskGraph
 
 class Task:
     """任务类"""
@@ -19,18 +24,117 @@ class Task:
         self.last_run = None
         self.next_run = None
         self.enabled = True
+        self.job = None  # 对应的schedule任务
+        self.deferred_since = None  # 首次被推迟的时间，None表示未推迟
+        self.deferred_count = 0  # 本轮推迟期间被跳过的触发次数
+        self.defer_reason = None
         
     def __lt__(self, other):
         return self.priority > other.priority  # 优先级数字越大越优先
 
+class AdmissionController:
+    """
+    负载感知的任务准入控制器
+    
+    系统负载超过阈值时推迟低优先级任务，负载回落后按速率限制补跑
+    """
+    def __init__(self, cpu_threshold: float = 85.0, memory_threshold: float = 90.0,
+                 protected_priority: int = 8, max_defer_seconds: float = 3600,
+                 catch_up_rate: float = 1.0, sample_interval: float = 1.0):
+        """
+        Args:
+            cpu_threshold: CPU使用率阈值(%)
+            memory_threshold: 内存使用率阈值(%)
+            protected_priority: 不受限流影响的最低优先级
+            max_defer_seconds: 最长推迟时间，超过后强制执行以避免饿死
+            catch_up_rate: 负载回落后每秒最多补跑的任务数
+            sample_interval: 负载采样的缓存时间(秒)
+        """
+        self.cpu_threshold = cpu_threshold
+        self.memory_threshold = memory_threshold
+        self.protected_priority = protected_priority
+        self.max_defer_seconds = max_defer_seconds
+        self.catch_up_rate = catch_up_rate
+        self.sample_interval = sample_interval
+        self._load: Dict[str, float] = {"cpu": 0.0, "memory": 0.0}
+        self._sampled_at = 0.0
+        self._tokens = catch_up_rate
+        self._refilled_at = time.monotonic()
+        
+    def get_load(self) -> Dict[str, float]:
+        """获取当前负载(带缓存，避免每次准入判断都采样)"""
+        now = time.monotonic()
+        if now - self._sampled_at >= self.sample_interval:
+            self._load = {
+                "cpu": psutil.cpu_percent(interval=None),
+                "memory": psutil.virtual_memory().percent
+            }
+            self._sampled_at = now
+        return self._load
+        
+    def overload_reason(self) -> Optional[str]:
+        """返回过载原因，未过载返回None"""
+        load = self.get_load()
+        if load["cpu"] > self.cpu_threshold:
+            return f"CPU使用率过高 ({load['cpu']}%)"
+        if load["memory"] > self.memory_threshold:
+            return f"内存使用率过高 ({load['memory']}%)"
+        return None
+        
+    def check(self, task: Task) -> Optional[str]:
+        """
+        准入检查
+        
+        Returns:
+            需要推迟时返回原因，允许执行返回None
+        """
+        if task.priority >= self.protected_priority:
+            return None
+        if task.deferred_since and \
+                (datetime.now() - task.deferred_since).total_seconds() >= self.max_defer_seconds:
+            return None
+        return self.overload_reason()
+        
+    def acquire_catch_up_slot(self) -> bool:
+        """令牌桶限速，获取一个补跑名额"""
+        now = time.monotonic()
+        self._tokens = min(max(self.catch_up_rate, 1.0),
+                           self._tokens + (now - self._refilled_at) * self.catch_up_rate)
+        self._refilled_at = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
 class TaskScheduler:
     """任务调度器"""
-    def __init__(self):
+    def __init__(self, admission_controller: Optional[AdmissionController] = None,
+                 journal: Optional[TaskJournal] = None,
+                 catch_up_policy: CatchUpPolicy = CatchUpPolicy.ONCE,
+                 max_catch_up_runs: int = 100, max_workers: int = 4):
+        """
+        Args:
+            admission_controller: 准入控制器，默认按系统负载限流
+            journal: 任务日志，提供时持久化任务状态并在重启后补跑错过的任务
+            catch_up_policy: 错过任务的补跑策略
+            max_catch_up_runs: ALL策略下单个任务的最大补跑次数
+            max_workers: 任务图并行执行的工作线程数
+        """
         self.logger = logging.getLogger(__name__)
         self.tasks: Dict[str, Task] = {}
         self.task_queue = PriorityQueue()
         self.running = False
         self.thread = None
+        self.admission = admission_controller or AdmissionController()
+        self._deferred: Dict[str, Task] = {}  # 被推迟等待补跑的任务
+        self._lock = threading.Lock()
+        self.journal = journal
+        self.catch_up_policy = catch_up_policy
+        self.max_catch_up_runs = max_catch_up_runs
+        self._catch_up: List[Task] = []  # 待补跑的错过任务
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._graph_reports: Dict[str, Dict[str, Any]] = {}
         
     def add_task(self, name: str, func: Callable, schedule_type: str,
                  schedule_time: str, priority: int = 0) -> bool:
@@ -52,17 +156,23 @@ class TaskScheduler:
             
             # 设置调度
             if schedule_type == 'daily':
-                schedule.every().day.at(schedule_time).do(self._run_task, task)
+                task.job = schedule.every().day.at(schedule_time).do(self._run_task, task)
             elif schedule_type == 'weekly':
                 day, time = schedule_time.split()
-                getattr(schedule.every(), day.lower()).at(time).do(self._run_task, task)
+                task.job = getattr(schedule.every(), day.lower()).at(time).do(self._run_task, task)
             elif schedule_type == 'interval':
                 interval = int(schedule_time)
-                schedule.every(interval).minutes.do(self._run_task, task)
+                task.job = schedule.every(interval).minutes.do(self._run_task, task)
             else:
                 self.logger.error(f"未知的调度类型: {schedule_type}")
                 return False
                 
+            task.next_run = task.job.next_run
+            if self.journal:
+                self._restore_task(task)
+                self.journal.save_task(name, schedule_type, schedule_time, priority,
+                                       task.enabled, task.next_run)
+                
             self.tasks[name] = task
             self.task_queue.put(task)
             return True
@@ -71,12 +181,67 @@ class TaskScheduler:
             self.logger.error(f"添加任务失败 {name}: {str(e)}")
             return False
             
+    def add_graph_task(self, graph: TaskGraph, schedule_type: str,
+                       schedule_time: str, priority: int = 0) -> bool:
+        """
+        添加任务图
+        
+        Args:
+            graph: 任务依赖图，以图名称作为任务名称
+            schedule_type: 调度类型 (daily, weekly, interval)
+            schedule_time: 调度时间
+            priority: 优先级 (0-10，越大优先级越高)
+            
+        Returns:
+            是否添加成功
+        """
+        if graph.topological_order() is None:
+            self.logger.error(f"任务图无效: {graph.name}")
+            return False
+        return self.add_task(graph.name, lambda: self._run_graph_task(graph),
+                             schedule_type, schedule_time, priority)
+        
+    def run_graph(self, graph: TaskGraph) -> Dict[str, Any]:
+        """
+        在工作线程池中执行任务图
+        
+        Returns:
+            执行报告，包含各节点结果、耗时和关键路径
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="task-graph")
+        report = graph.run(self._executor)
+        if report:
+            self._graph_reports[graph.name] = report
+            self.logger.info(
+                f"任务图执行完成 {graph.name}: 总耗时 {report['total_time']:.2f}s, "
+                f"关键路径 {' -> '.join(report['critical_path'])} "
+                f"({report['critical_path_time']:.2f}s)"
+            )
+        return report
+        
+    def _run_graph_task(self, graph: TaskGraph):
+        """作为调度任务执行任务图，有节点未完成时视为任务失败"""
+        report = self.run_graph(graph)
+        failed = [name for name, state in report.get("status", {}).items() if state != "success"]
+        if not report or failed:
+            raise RuntimeError(f"任务图节点未完成: {', '.join(failed)}")
+        
+    def get_graph_report(self, name: str) -> Optional[Dict[str, Any]]:
+        """获取任务图最近一次的执行报告"""
+        return self._graph_reports.get(name)
+        
     def remove_task(self, name: str) -> bool:
         """删除任务"""
         try:
             if name in self.tasks:
-                schedule.cancel_job(self.tasks[name])
+                schedule.cancel_job(self.tasks[name].job)
                 del self.tasks[name]
+                if self.journal:
+                    self.journal.remove_task(name)
+                with self._lock:
+                    self._deferred.pop(name, None)
                 # 重建优先队列
                 with self.task_queue.mutex:
                     self.task_queue.queue = [t for t in self.task_queue.queue if t.name != name]
@@ -91,6 +256,8 @@ class TaskScheduler:
         try:
             if name in self.tasks:
                 self.tasks[name].enabled = True
+                if self.journal:
+                    self.journal.set_enabled(name, True)
                 return True
             return False
         except Exception as e:
@@ -102,6 +269,8 @@ class TaskScheduler:
         try:
             if name in self.tasks:
                 self.tasks[name].enabled = False
+                if self.journal:
+                    self.journal.set_enabled(name, False)
                 return True
             return False
         except Exception as e:
@@ -122,30 +291,135 @@ class TaskScheduler:
         self.running = False
         if self.thread:
             self.thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
         self.logger.info("任务调度器已停止")
         
     def _run_scheduler(self):
         """运行调度器"""
         while self.running:
             try:
+                self._run_catch_up()
                 schedule.run_pending()
+                self._run_deferred()
+                self._sync_next_runs()
                 time.sleep(1)
             except Exception as e:
                 self.logger.error(f"调度器运行错误: {str(e)}")
                 
+    def _restore_task(self, task: Task):
+        """从任务日志恢复任务状态，并按补跑策略安排错过的运行"""
+        record = self.journal.get_record(task.name)
+        if not record:
+            return
+            
+        task.last_run = record["last_run"]
+        task.enabled = record["enabled"]
+        
+        missed = self._count_missed_runs(task, record["next_run"])
+        if missed == 0 or self.catch_up_policy == CatchUpPolicy.SKIP:
+            return
+        runs = 1 if self.catch_up_policy == CatchUpPolicy.ONCE else min(missed, self.max_catch_up_runs)
+        self.logger.info(f"任务 {task.name} 错过 {missed} 次运行，将补跑 {runs} 次")
+        with self._lock:
+            self._catch_up.extend([task] * runs)
+            
+    def _count_missed_runs(self, task: Task, due: Optional[datetime]) -> int:
+        """计算停机期间错过的运行次数"""
+        now = datetime.now()
+        if due is None or due > now:
+            return 0
+        period = timedelta(**{task.job.unit: task.job.interval})
+        return int((now - due) / period) + 1
+        
+    def _run_catch_up(self):
+        """执行待补跑的错过任务"""
+        if not self._catch_up:
+            return
+            
+        with self._lock:
+            pending, self._catch_up = self._catch_up, []
+        for task in pending:
+            if task.name in self.tasks:
+                self._run_task(task)
+                
+    def _sync_next_runs(self):
+        """同步下次运行时间到任务日志"""
+        changed = []
+        for task in list(self.tasks.values()):
+            if task.job and task.job.next_run != task.next_run:
+                task.next_run = task.job.next_run
+                changed.append((task.name, task.next_run))
+        if changed and self.journal:
+            self.journal.update_next_runs(changed)
+            
     def _run_task(self, task: Task):
         """运行任务"""
         if not task.enabled:
             return
             
+        reason = self.admission.check(task)
+        if reason:
+            self._defer_task(task, reason)
+            return
+            
+        with self._lock:
+            self._deferred.pop(task.name, None)
+        self._execute_task(task)
+        
+    def _defer_task(self, task: Task, reason: str):
+        """推迟任务，推迟期间的重复触发合并为一次补跑"""
+        with self._lock:
+            if task.deferred_since is None:
+                task.deferred_since = datetime.now()
+            task.deferred_count += 1
+            task.defer_reason = reason
+            self._deferred[task.name] = task
+        self.logger.info(f"任务已推迟 {task.name}: {reason}")
+        
+    def _run_deferred(self):
+        """负载回落后按优先级和速率限制补跑被推迟的任务"""
+        if not self._deferred:
+            return
+            
+        with self._lock:
+            pending = sorted(self._deferred.values())
+            
+        for task in pending:
+            if not task.enabled:
+                continue
+            reason = self.admission.check(task)
+            if reason:
+                task.defer_reason = reason
+                continue
+            if not self.admission.acquire_catch_up_slot():
+                break
+            with self._lock:
+                self._deferred.pop(task.name, None)
+            self.logger.info(f"补跑被推迟的任务: {task.name}")
+            self._execute_task(task)
+            
+    def _execute_task(self, task: Task):
+        """执行任务"""
+        status, error = "success", None
+        started = time.monotonic()
         try:
             self.logger.info(f"开始执行任务: {task.name}")
             task.last_run = datetime.now()
+            task.deferred_since = None
+            task.deferred_count = 0
+            task.defer_reason = None
             task.func()
             self.logger.info(f"任务执行完成: {task.name}")
         except Exception as e:
+            status, error = "failed", str(e)
             self.logger.error(f"任务执行失败 {task.name}: {str(e)}")
             
+        if self.journal:
+            self.journal.record_run(task.name, task.last_run, status,
+                                    time.monotonic() - started, error)
+            
     def get_task_status(self) -> List[Dict]:
         """获取任务状态"""
         status = []
@@ -155,7 +429,11 @@ class TaskScheduler:
                 "enabled": task.enabled,
                 "priority": task.priority,
                 "last_run": task.last_run.isoformat() if task.last_run else None,
-                "next_run": task.next_run.isoformat() if task.next_run else None
+                "next_run": task.next_run.isoformat() if task.next_run else None,
+                "deferred": task.deferred_since is not None,
+                "deferred_since": task.deferred_since.isoformat() if task.deferred_since else None,
+                "deferred_count": task.deferred_count,
+                "defer_reason": task.defer_reason
             })
         return sorted(status, key=lambda x: x['priority'], reverse=True)
         
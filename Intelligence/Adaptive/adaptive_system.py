@@ -3,9 +3,13 @@
 负责系统的自适应行为和动态调整
 """
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 
+from Core.Memory.process_memory import ProcessMemoryCollector
+from Core.System.pressure_monitor import PressureMonitor
+from Core.Process.cgroup_manager import CgroupManager
+
 class AdaptiveSystem:
     """自适应系统类"""
     
@@ -15,6 +19,15 @@ class AdaptiveSystem:
         self._resource_usage_history = []
         self._adaptation_rules = {}
         self._system_state = {}
+        self._memory_collector = ProcessMemoryCollector()
+        self._memory_consumers: List[Dict] = []
+        self._pressure_monitor = PressureMonitor()
+        self._memory_pressure_threshold = 10.0  # PSI some avg10 (%)
+        self._cgroups = CgroupManager()
+        self._cgroup_parent = "system.slice"
+        self._cgroup_cpu_limit: Optional[float] = None  # 限制到的CPU核数，None表示只记录不限制
+        self._cgroup_cpu_threshold = 80.0
+        self._throttled_cgroups: List[str] = []
         self._init_adaptive_system()
         
     def _init_adaptive_system(self):
@@ -30,7 +43,7 @@ class AdaptiveSystem:
                 'action': self._handle_high_cpu_usage
             },
             'memory_pressure': {
-                'condition': lambda metrics: metrics['memory_usage'] > 85,
+                'condition': self._is_memory_pressure,
                 'action': self._handle_memory_pressure
             },
             'disk_space_low': {
@@ -39,6 +52,59 @@ class AdaptiveSystem:
             }
         }
         
+    def _is_memory_pressure(self, metrics: Dict[str, float]) -> bool:
+        """
+        判断是否存在内存压力
+        
+        支持PSI时以任务因内存停顿的时间比例为准，内存使用率包含可回收的页缓存，
+        只在不支持PSI时作为退路
+        """
+        pressure = self._pressure_monitor.read_pressure('memory')
+        if pressure and 'some' in pressure:
+            return pressure['some']['avg10'] >= self._memory_pressure_threshold
+        return metrics['memory_usage'] > 85
+        
+    def start_pressure_monitoring(self, stall_ms: int = 100, window_ms: int = 1000,
+                                  cpu_stall_ms: Optional[int] = None) -> bool:
+        """
+        启动PSI压力监控，内存或CPU停顿超过阈值时立即处理，无需等待指标更新
+        
+        Args:
+            stall_ms: 时间窗口内的内存停顿阈值(毫秒)
+            window_ms: 时间窗口(毫秒)
+            cpu_stall_ms: 时间窗口内的CPU停顿阈值(毫秒)，默认为内存阈值的5倍且不超过窗口的一半
+            
+        Returns:
+            系统是否支持PSI
+            
+        Raises:
+            ValueError: 停顿阈值不小于时间窗口
+        """
+        if not self._pressure_monitor.available:
+            self.logger.info("PSI not available, using memory usage threshold")
+            return False
+        if cpu_stall_ms is None:
+            cpu_stall_ms = min(stall_ms * 5, window_ms // 2)
+        self._memory_pressure_threshold = stall_ms / window_ms * 100
+        self._pressure_monitor.add_trigger('memory', self._on_pressure, stall_ms, window_ms)
+        self._pressure_monitor.add_trigger('cpu', self._on_pressure, cpu_stall_ms, window_ms)
+        self._pressure_monitor.start()
+        return True
+        
+    def _on_pressure(self, resource: str, pressure: Dict):
+        """处理PSI压力事件"""
+        some = pressure.get('some', {})
+        self.logger.info(f"{resource} pressure event: avg10={some.get('avg10')}%")
+        self._system_state[f'{resource}_pressure'] = some.get('avg10')
+        if resource == 'memory':
+            self._handle_memory_pressure()
+        elif resource == 'cpu':
+            self._handle_high_cpu_usage()
+        
+    def get_pressure(self) -> Dict[str, Dict]:
+        """获取各资源的PSI压力"""
+        return self._pressure_monitor.read_all()
+        
     def update_system_metrics(self, metrics: Dict[str, float]):
         """
         更新系统指标
@@ -68,19 +134,69 @@ class AdaptiveSystem:
     def _handle_high_cpu_usage(self):
         """处理CPU高使用率情况"""
         self.logger.info("Handling high CPU usage...")
-        # TODO: 实现CPU使用率优化策略
-        # 1. 识别CPU密集型进程
-        # 2. 调整进程优先级
-        # 3. 必要时限制某些进程的CPU使用
+        if not self._cgroups.available:
+            return
+        # 以服务(cgroup)为单位识别CPU密集的负载，限制整个服务而不是单个进程
+        try:
+            top = self._cgroups.top_cpu_cgroups(self._cgroup_parent, limit=5, interval=0.2)
+        except Exception as e:
+            self.logger.error(f"Error reading cgroup CPU usage: {str(e)}")
+            return
+        for usage in top:
+            cgroup, percent = usage['cgroup'], usage['cpu_percent']
+            self.logger.info(f"Service {cgroup} CPU usage: {percent:.1f}%")
+            if self._cgroup_cpu_limit is None or percent < self._cgroup_cpu_threshold or \
+                    cgroup in self._throttled_cgroups:
+                continue
+            if self._cgroups.set_cpu_limit(cgroup, self._cgroup_cpu_limit):
+                self._throttled_cgroups.append(cgroup)
+                
+    def enable_cgroup_throttling(self, cpu_limit: float, threshold: float = 80.0,
+                                 parent: str = "system.slice"):
+        """
+        启用基于cgroup的服务CPU限制
+        
+        Args:
+            cpu_limit: CPU使用率过高的服务限制到的CPU核数
+            threshold: 触发限制的服务CPU使用率(%)
+            parent: 服务所在的父cgroup
+        """
+        self._cgroup_cpu_limit = cpu_limit
+        self._cgroup_cpu_threshold = threshold
+        self._cgroup_parent = parent
+        
+    def release_cgroup_throttling(self):
+        """解除已设置的服务CPU限制"""
+        for cgroup in self._throttled_cgroups:
+            self._cgroups.set_cpu_limit(cgroup, None)
+        self._throttled_cgroups.clear()
+        self._cgroup_cpu_limit = None
         
     def _handle_memory_pressure(self):
         """处理内存压力情况"""
         self.logger.info("Handling memory pressure...")
+        # 按PSS定位内存占用最多的进程，共享页按进程数均摊，避免重复计算
+        try:
+            self._memory_consumers = self._memory_collector.top_consumers(limit=5, key='pss')
+        except Exception as e:
+            self.logger.error(f"Error collecting process memory: {str(e)}")
+            return
+        for stats in self._memory_consumers:
+            self.logger.info(
+                f"Top memory consumer {stats['name']} ({stats['pid']}): "
+                f"PSS {stats['pss'] / (1024*1024):.1f} MB, "
+                f"USS {stats['uss'] / (1024*1024):.1f} MB, "
+                f"swap {stats['swap'] / (1024*1024):.1f} MB"
+            )
         # TODO: 实现内存压力处理策略
         # 1. 触发垃圾回收
         # 2. 释放缓存
         # 3. 必要时请求进程释放内存
         
+    def get_memory_consumers(self) -> List[Dict]:
+        """获取最近一次内存压力处理时的主要内存占用进程"""
+        return self._memory_consumers
+        
     def _handle_low_disk_space(self):
         """处理磁盘空间不足情况"""
         self.logger.info("Handling low disk space...")
@@ -152,4 +268,6 @@ class AdaptiveSystem:
         self._resource_usage_history.clear()
         self._adaptation_rules.clear()
         self._system_state.clear()
+        self._pressure_monitor.stop()
+        self._memory_collector.close()
         self.logger.info("Adaptive system cleaned up")
@@ -5,16 +5,22 @@
 import os
 import sys
 import psutil
-import shutil
 import logging
 import winreg
 from typing import List, Dict, Optional
 from pathlib import Path
 
+from Core.FileSystem.file_scanner import FileScanner, PSEUDO_FILESYSTEMS
+from Core.FileSystem.file_index import FileIndex
+from Core.FileSystem.duplicate_finder import DuplicateFinder
+
 class SystemTools:
     """系统工具类"""
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.scanner = FileScanner()
+        self._file_index: Optional[FileIndex] = None
+        self._duplicate_finder: Optional[DuplicateFinder] = None
         
     def clean_system(self) -> Dict[str, int]:
         """
@@ -60,30 +66,12 @@ class SystemTools:
         
     def _clean_directory(self, directory: str) -> int:
         """清理指定目录"""
-        cleaned_size = 0
         try:
-            for root, dirs, files in os.walk(directory, topdown=False):
-                for name in files:
-                    try:
-                        file_path = os.path.join(root, name)
-                        if os.path.exists(file_path):
-                            cleaned_size += os.path.getsize(file_path)
-                            os.remove(file_path)
-                    except Exception:
-                        continue
-                        
-                for name in dirs:
-                    try:
-                        dir_path = os.path.join(root, name)
-                        if os.path.exists(dir_path):
-                            shutil.rmtree(dir_path, ignore_errors=True)
-                    except Exception:
-                        continue
+            return self.scanner.delete_files(directory, remove_dirs=True)
         except Exception as e:
             self.logger.error(f"清理目录失败 {directory}: {str(e)}")
+            return 0
             
-        return cleaned_size
-        
     def _clean_recycle_bin(self) -> int:
         """清理回收站"""
         cleaned_size = 0
@@ -244,6 +232,7 @@ class SystemTools:
         results = {
             "partitions": [],
             "large_files": [],
+            "growth": [],
             "recommendations": []
         }
         
@@ -269,44 +258,82 @@ class SystemTools:
                 except Exception:
                     continue
                     
-            # 查找大文件
+            # 增量更新文件索引后查找大文件和增长最多的目录
             results["large_files"] = self._find_large_files()
+            results["growth"] = self._get_file_index().get_growth()
             
         except Exception as e:
             self.logger.error(f"分析磁盘空间失败: {str(e)}")
             
         return results
         
-    def _find_large_files(self, min_size: int = 100*1024*1024) -> List[Dict]:
+    def _get_file_index(self) -> FileIndex:
+        """获取文件索引(首次使用时加载)"""
+        if self._file_index is None:
+            self._file_index = FileIndex(scanner=self.scanner)
+        return self._file_index
+        
+    def _find_large_files(self, min_size: int = 100*1024*1024, limit: int = 20) -> List[Dict]:
         """查找大文件"""
-        large_files = []
         try:
-            for partition in psutil.disk_partitions():
-                try:
-                    if partition.fstype:  # 确保是有效的文件系统
-                        for root, _, files in os.walk(partition.mountpoint):
-                            for file in files:
-                                try:
-                                    file_path = os.path.join(root, file)
-                                    size = os.path.getsize(file_path)
-                                    if size > min_size:
-                                        large_files.append({
-                                            "path": file_path,
-                                            "size": size
-                                        })
-                                except Exception:
-                                    continue
-                except Exception:
-                    continue
-                    
-            # 按大小排序
-            large_files.sort(key=lambda x: x['size'], reverse=True)
-            return large_files[:20]  # 返回最大的20个文件
+            roots = [
+                partition.mountpoint for partition in psutil.disk_partitions()
+                if partition.fstype and partition.fstype not in PSEUDO_FILESYSTEMS
+            ]
+            index = self._get_file_index()
+            index.update(roots)
+            return index.largest_files(limit, min_size)
             
         except Exception as e:
             self.logger.error(f"查找大文件失败: {str(e)}")
             return []
             
+    def find_duplicate_files(self, roots: Optional[List[str]] = None,
+                             min_size: int = 1024*1024) -> Dict:
+        """
+        查找重复文件
+        
+        Args:
+            roots: 查找的目录，None表示所有已索引的分区
+            min_size: 最小文件大小
+            
+        Returns:
+            重复文件分组及可回收的字节数
+        """
+        try:
+            if self._duplicate_finder is None:
+                self._duplicate_finder = DuplicateFinder(self._get_file_index())
+            result = self._duplicate_finder.find_duplicates(roots, min_size)
+            if result["reclaimable_bytes"] > 0:
+                result["recommendation"] = (
+                    f"发现 {len(result['groups'])} 组重复文件，"
+                    f"可回收 {self.format_bytes(result['reclaimable_bytes'])}"
+                )
+            return result
+        except Exception as e:
+            self.logger.error(f"查找重复文件失败: {str(e)}")
+            return {"groups": [], "reclaimable_bytes": 0}
+            
+    def get_directory_usage(self, path: str, limit: int = 20) -> List[Dict]:
+        """
+        获取目录下各子目录的大小汇总
+        
+        Args:
+            path: 目录
+            limit: 返回数量限制
+            
+        Returns:
+            按大小降序排列的子目录列表
+        """
+        try:
+            index = self._get_file_index()
+            if index.get_directory_size(path) is None:
+                index.update([path])
+            return index.get_directory_usage(path, limit)
+        except Exception as e:
+            self.logger.error(f"获取目录大小失败 {path}: {str(e)}")
+            return []
+            
     def format_bytes(self, bytes: int) -> str:
         """格式化字节大小"""
         for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -10,6 +10,7 @@ from PyQt5.QtChart import QChart, QChartView, QLineSeries
 
 from Core.base_system import BaseSystem
 from Core.task_scheduler import TaskScheduler
+from Core.task_journal import TaskJournal
 from Core.ai_system import AISystem
 from Tools.system_tools import SystemTools
 from Tools.system_optimizer import SystemOptimizer
@@ -19,7 +20,7 @@ class OSAI_App(QMainWindow):
     def __init__(self):
         super().__init__()
         self.base_system = BaseSystem()
-        self.task_scheduler = TaskScheduler()
+        self.task_scheduler = TaskScheduler(journal=TaskJournal())
         self.ai_system = AISystem()
         self.system_tools = SystemTools()
         self.system_optimizer = SystemOptimizer()
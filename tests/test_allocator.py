@@ -0,0 +1,25 @@
+"""
+伙伴系统分配器测试
+"""
+import pytest
+
+from Core.Memory.allocator import BuddyAllocator
+from Core.Memory.memory_manager import MemoryManager
+
+@pytest.mark.parametrize("size", [0, -5])
+def test_allocate_rejects_non_positive_size(size):
+    allocator = BuddyAllocator(1 << 20)
+    free_bytes = allocator.free_bytes
+
+    with pytest.raises(ValueError):
+        allocator.allocate(size, owner=1)
+
+    assert allocator.free_bytes == free_bytes
+    assert allocator.requested_bytes == 0
+
+@pytest.mark.parametrize("size", [0, -5])
+def test_allocate_memory_rejects_non_positive_size(size):
+    manager = MemoryManager(arena_size=1 << 20)
+
+    assert manager.allocate_memory(size, process_id=1) is None
+    assert manager._allocator.requested_bytes == 0